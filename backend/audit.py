@@ -0,0 +1,191 @@
+# audit.py
+import asyncio
+import logging
+import os
+import queue
+from datetime import date, datetime, timezone
+from typing import Callable, List
+
+from sqlalchemy import event, insert, inspect
+
+import models
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# How often the background writer flushes, and how many entries go in one INSERT
+AUDIT_FLUSH_INTERVAL_SECONDS = float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", "1"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+# Past this many queued entries the committing request flushes inline instead
+AUDIT_QUEUE_LIMIT = int(os.getenv("AUDIT_QUEUE_LIMIT", "10000"))
+
+AUDITED_MODELS = (
+    models.Chemical_catalogue, models.Order, models.User, models.Location, models.Department,
+)
+# Maintained by the database, and noise in a diff
+IGNORED_FIELDS = {"id", "created_at", "edited_at"}
+REDACTED_FIELDS = {"password"}
+REDACTED = "[redacted]"
+
+CREATE, UPDATE, DELETE = "create", "update", "delete"
+
+# Callables given each committed transaction's entries, for in-process state
+# that must follow the database (e.g. the barcode map)
+commit_listeners: List[Callable[[List[dict]], None]] = []
+
+
+def _json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def diff(before: dict, after: dict) -> dict:
+    """{field: [before, after]} for every field whose value differs."""
+    changes = {}
+    for field in before.keys() | after.keys():
+        if field in IGNORED_FIELDS:
+            continue
+        old, new = before.get(field), after.get(field)
+        if old == new:
+            continue
+        if field in REDACTED_FIELDS:
+            changes[field] = [REDACTED if old is not None else None, REDACTED if new is not None else None]
+        else:
+            changes[field] = [_json_value(old), _json_value(new)]
+    return changes
+
+
+def record(db, entity: str, entity_id, action: str, before: dict = None, after: dict = None):
+    """Stage an audit entry on the session; it is queued once the session commits.
+
+    ORM changes are captured automatically at flush; Core writes (bulk inserts,
+    bulk updates, query deletes) call this with the values they changed.
+    """
+    changes = diff(before or {}, after or {})
+    if action == UPDATE and not changes:
+        return
+    db.info.setdefault("audit", []).append({
+        "entity": entity,
+        "entity_id": entity_id,
+        "action": action,
+        "changes": changes,
+        "created_at": datetime.now(timezone.utc).replace(tzinfo=None),
+    })
+
+
+def column_values(row) -> dict:
+    """Column values of a Row or a mapping, as audit snapshots expect them."""
+    return dict(row._mapping) if hasattr(row, "_mapping") else dict(row)
+
+
+def _loaded_values(state) -> dict:
+    # Only what is already loaded: reading expired attributes would emit SQL mid-flush
+    return {attr.key: state.dict[attr.key] for attr in state.mapper.column_attrs if attr.key in state.dict}
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _capture_flush(session, flush_context):
+    for obj in session.new:
+        if isinstance(obj, AUDITED_MODELS):
+            record(session, obj.__tablename__, obj.id, CREATE, after=_loaded_values(inspect(obj)))
+    for obj in session.dirty:
+        if not isinstance(obj, AUDITED_MODELS):
+            continue
+        state = inspect(obj)
+        before, after = {}, {}
+        for attr in state.mapper.column_attrs:
+            history = state.attrs[attr.key].history
+            if history.has_changes():
+                before[attr.key] = history.deleted[0] if history.deleted else None
+                after[attr.key] = history.added[0] if history.added else None
+        record(session, obj.__tablename__, obj.id, UPDATE, before, after)
+    for obj in session.deleted:
+        if isinstance(obj, AUDITED_MODELS):
+            record(session, obj.__tablename__, obj.id, DELETE, before=_loaded_values(inspect(obj)))
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _queue_committed(session):
+    entries = session.info.pop("audit", None)
+    if entries:
+        audit_writer.put(entries, session.info.get("actor_id"))
+        for listener in commit_listeners:
+            try:
+                listener(entries)
+            except Exception:
+                logger.exception("Audit commit listener failed")
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_rolled_back(session):
+    session.info.pop("audit", None)
+
+
+class AuditWriter:
+    """In-process queue of committed audit entries, written in batched INSERTs."""
+
+    def __init__(self, batch_size: int = AUDIT_BATCH_SIZE, limit: int = AUDIT_QUEUE_LIMIT):
+        self.batch_size = batch_size
+        self.limit = limit
+        self.written = 0
+        self.batches = 0
+        self._queue = queue.SimpleQueue()
+
+    def put(self, entries, user_id):
+        for entry in entries:
+            self._queue.put({**entry, "user_id": user_id})
+        if self._queue.qsize() > self.limit:
+            # The writer is falling behind; push back on writers rather than drop history
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Inline audit flush failed; entries stay queued")
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _drain(self):
+        rows = []
+        while len(rows) < self.batch_size:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def flush(self) -> int:
+        """Write everything queued so far; returns the number of entries written."""
+        written = 0
+        while True:
+            rows = self._drain()
+            if not rows:
+                return written
+            db = SessionLocal()
+            try:
+                db.execute(insert(models.AuditLog.__table__), rows)
+                db.commit()
+            except Exception:
+                for row in rows:
+                    self._queue.put(row)
+                raise
+            finally:
+                db.close()
+            written += len(rows)
+            self.written += len(rows)
+            self.batches += 1
+
+    def stats(self) -> dict:
+        return {"pending": self.pending(), "written": self.written, "batches": self.batches}
+
+
+audit_writer = AuditWriter()
+
+
+async def run_audit_writer(interval: float = AUDIT_FLUSH_INTERVAL_SECONDS):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(audit_writer.flush)
+        except Exception:
+            logger.exception("Audit flush failed; entries stay queued for the next attempt")
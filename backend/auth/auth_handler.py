@@ -1,12 +1,14 @@
-import jwt
 from fastapi import Depends, HTTPException, status, APIRouter
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
-from jwt.exceptions import InvalidTokenError
-from passlib.context import CryptContext
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+import asyncio
+import os
 
 from sqlalchemy.orm import Session
 
+from cache import TTLCache
 from database import get_db
 from schemas import TokenData
 from models import User
@@ -17,23 +19,74 @@ SECRET_KEY = "09d25e094faa6ca2556c818166b7a9563b93f7099f6f0f4caa6cf63b88e8d3e7"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Resolved users keyed by token subject (email), so authenticated requests
+# skip the user lookup until the entry expires or the user is changed
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+# passlib and jwt (which pulls in cryptography) are imported on first use,
+# keeping them out of process startup
+pwd_context = None
+
+def get_pwd_context():
+    global pwd_context
+    if pwd_context is None:
+        from passlib.context import CryptContext
+
+        pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return pwd_context
+
+# bcrypt is deliberately slow, so hashing runs on a small dedicated pool instead
+# of the event loop. The pool size caps how many hashes run at once; set it to
+# 0 to hash inline.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+password_executor = (
+    ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+    if PASSWORD_HASH_WORKERS > 0 else None
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
 router = APIRouter()
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
+
+
+def _release_connection(db: Session | None):
+    if db is not None:
+        # Don't hold a pooled connection while bcrypt runs. Loaded objects stay
+        # readable (detached) and the session can be used again afterwards.
+        db.close()
+
+
+def run_password_task(func, *args, db: Session | None = None):
+    """For sync routes: blocks the calling threadpool thread, never the event loop."""
+    _release_connection(db)
+    if password_executor is None:
+        return func(*args)
+    return password_executor.submit(func, *args).result()
+
+
+async def run_password_task_async(func, *args, db: Session | None = None):
+    _release_connection(db)
+    if password_executor is None:
+        return func(*args)
+    return await asyncio.get_running_loop().run_in_executor(password_executor, func, *args)
 
 
 def get_user(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
 
 
+def invalidate_cached_user(*emails: str):
+    user_cache.invalidate(*emails)
+
+
 def authenticate_user(db: Session, email: str, password: str):
     user = get_user(db, email)
     if not user:
@@ -43,6 +96,15 @@ def authenticate_user(db: Session, email: str, password: str):
     return user
 
 
+async def authenticate_user_async(db: Session, email: str, password: str):
+    user = await run_in_threadpool(get_user, db, email)
+    if not user:
+        return False
+    if not await run_password_task_async(verify_password, password, user.password, db=db):
+        return False
+    return user
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     if expires_delta:
@@ -50,11 +112,15 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=15)
     to_encode.update({"exp": expire})
+    import jwt
+
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
 async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    import jwt
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -66,12 +132,20 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         if email is None:
             raise credentials_exception
         token_data = TokenData(username=email)  # We keep username field for backward compatibility
-    except InvalidTokenError:
+    except jwt.InvalidTokenError:
         raise credentials_exception
 
-    user = get_user(db, email=email)
-    if user is None:
-        raise credentials_exception
+    cached = user_cache.get(email)
+    if cached is not None:
+        # Detached copy: handlers that modify the user must load it from their session
+        user = User(**cached)
+    else:
+        user = get_user(db, email=email)
+        if user is None:
+            raise credentials_exception
+        user_cache.set(email, {column.key: getattr(user, column.key) for column in User.__table__.columns})
+    # The request's handlers share this session, so their audit entries name the user
+    db.info["actor_id"] = user.id
     return user
 
 
@@ -0,0 +1,124 @@
+# barcodes.py
+import os
+import threading
+from typing import Dict, List
+
+from sqlalchemy import select
+
+import models
+from audit import commit_listeners
+
+# Keep a barcode -> chemical id map in process so scans resolve by primary key
+BARCODE_MAP = os.getenv("BARCODE_MAP", "1").lower() in ("1", "true", "yes")
+
+
+class BarcodeIndex:
+    """Barcode -> chemical id map, loaded on first use and kept current from commits.
+
+    The map is a hint, never the answer: ids it returns are checked against the
+    rows they load, and codes it misses are looked up in the database, so
+    writes from other processes cost a fallback query rather than a wrong result.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+
+    def load(self, db):
+        table = models.Chemical_catalogue.__table__
+        ids = dict(db.execute(select(table.c.barcode, table.c.id).where(table.c.barcode.isnot(None))).all())
+        with self._lock:
+            self._ids = ids
+            self.loaded = True
+
+    def ids(self, db, barcodes) -> Dict[str, int]:
+        if not self.loaded:
+            self.load(db)
+        with self._lock:
+            found = {code: self._ids[code] for code in barcodes if code in self._ids}
+            self.hits += len(found)
+            self.misses += len(barcodes) - len(found)
+        return found
+
+    def set(self, barcode: str, chemical_id: int):
+        with self._lock:
+            self._ids[barcode] = chemical_id
+
+    def learn(self, barcode: str, chemical_id: int):
+        # Found in the database after the map missed it
+        with self._lock:
+            self._ids[barcode] = chemical_id
+            self.fallbacks += 1
+
+    def discard(self, barcode: str, chemical_id: int):
+        with self._lock:
+            if self._ids.get(barcode) == chemical_id:
+                del self._ids[barcode]
+
+    def apply(self, entries: List[dict]):
+        """Commit listener: follow barcode changes recorded in audit entries."""
+        if not self.loaded:
+            return
+        for entry in entries:
+            if entry["entity"] != models.Chemical_catalogue.__tablename__ or "barcode" not in entry["changes"]:
+                continue
+            old, new = entry["changes"]["barcode"]
+            if old is not None:
+                self.discard(old, entry["entity_id"])
+            if new is not None:
+                self.set(new, entry["entity_id"])
+
+    def clear(self):
+        with self._lock:
+            self._ids = {}
+            self.loaded = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": BARCODE_MAP,
+                "loaded": self.loaded,
+                "size": len(self._ids),
+                "hits": self.hits,
+                "misses": self.misses,
+                "fallbacks": self.fallbacks,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+barcode_index = BarcodeIndex()
+if BARCODE_MAP:
+    commit_listeners.append(barcode_index.apply)
+
+
+def resolve_barcodes(db, query, barcodes) -> dict:
+    """Map each barcode to its row from `query`, a catalogue query selecting id and barcode.
+
+    With the map warm this is one primary-key lookup for the whole list; codes
+    the map does not know (or knows wrongly) take one extra indexed query.
+    """
+    model = models.Chemical_catalogue
+    wanted = list(dict.fromkeys(barcodes))
+    found = {}
+    if BARCODE_MAP:
+        ids = barcode_index.ids(db, wanted)
+        if ids:
+            for row in query.filter(model.id.in_(set(ids.values()))):
+                if ids.get(row.barcode) == row.id:
+                    found[row.barcode] = row
+            for code, chemical_id in ids.items():
+                if code not in found:
+                    barcode_index.discard(code, chemical_id)
+
+    rest = [code for code in wanted if code not in found]
+    if rest:
+        for row in query.filter(model.barcode.in_(rest)):
+            found[row.barcode] = row
+            if BARCODE_MAP:
+                barcode_index.learn(row.barcode, row.id)
+    return found
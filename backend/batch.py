@@ -0,0 +1,24 @@
+# batch.py
+from typing import List, Optional
+
+import schemas
+
+
+def item_ok(index: int, item_id: Optional[int] = None) -> schemas.BatchItemResult:
+    return schemas.BatchItemResult(index=index, id=item_id, ok=True)
+
+
+def item_failed(index: int, error: str, item_id: Optional[int] = None) -> schemas.BatchItemResult:
+    return schemas.BatchItemResult(index=index, id=item_id, ok=False, error=error)
+
+
+def batch_result(results: List[schemas.BatchItemResult]) -> schemas.BatchResult:
+    succeeded = sum(1 for result in results if result.ok)
+    return schemas.BatchResult(succeeded=succeeded, failed=len(results) - succeeded, results=results)
+
+
+def fail_pending(results: List[schemas.BatchItemResult], error: str):
+    # The transaction was rolled back, so nothing reported as applied was kept
+    for index, result in enumerate(results):
+        if result.ok:
+            results[index] = item_failed(result.index, error, result.id)
@@ -0,0 +1,165 @@
+# common.py
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def use_scratch_database():
+    """Point the app at a fresh SQLite file. Must run before the app is imported."""
+    fd, path = tempfile.mkstemp(prefix="chem-bench-", suffix=".db")
+    os.close(fd)
+    os.environ["DATABASE_PATH"] = path
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    return path
+
+
+def create_schema():
+    """Migrate the scratch database. The app only migrates in its lifespan, which
+    benchmarks driving it through httpx.ASGITransport never start."""
+    from database import engine
+    from migrations import run_migrations
+
+    run_migrations(engine)
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples):
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2) if samples else 0.0,
+    }
+
+
+class RouteRecorder:
+    """Collects per-route latencies and errors for a benchmark run."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, route: str, seconds: float, ok: bool = True):
+        self.samples[route].append(seconds)
+        if not ok:
+            self.errors[route] += 1
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    def report(self) -> dict:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        total = sum(len(samples) for samples in self.samples.values())
+        routes = {}
+        for route in sorted(self.samples):
+            samples = self.samples[route]
+            routes[route] = {
+                **summarize(samples),
+                "errors": self.errors[route],
+                "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+            }
+        return {
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "seconds": round(elapsed, 3),
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+            "routes": routes,
+        }
+
+
+BENCH_PASSWORD = "bench-password"
+
+
+def seed_database(users: int, locations: int, chemicals: int, orders: int, rng: random.Random) -> dict:
+    """Bulk-load a scratch database and return what the workload needs to address it.
+
+    Rows are inserted directly rather than through the API; every user shares
+    one bcrypt hash so seeding stays fast.
+    """
+    from sqlalchemy import insert
+
+    import models
+    from auth.auth_handler import get_password_hash
+    from database import SessionLocal
+    from rollups import rebuild_rollups
+
+    create_schema()
+    db = SessionLocal()
+    try:
+        password = get_password_hash(BENCH_PASSWORD)
+        emails = [f"bench{i}@example.com" for i in range(max(users, 1))]
+        db.execute(insert(models.User), [
+            {
+                "name": f"Bench User {i}", "email": email, "password": password,
+                "department": f"Department {i % 5}", "contact_person": i % 4 == 0, "role": "admin",
+            }
+            for i, email in enumerate(emails)
+        ])
+        user_ids = [row_id for (row_id,) in db.query(models.User.id)]
+
+        paths = [(f"Building {i % 4}", f"Room {i % 25}", f"Storage {i}") for i in range(max(locations, 1))]
+        db.execute(insert(models.Location), [
+            {
+                "location_building": building, "location_room": room, "location_storage": storage,
+                "created_by": user_ids[0], "edited_by": user_ids[0],
+            }
+            for building, room, storage in paths
+        ])
+        location_ids = [row_id for (row_id,) in db.query(models.Location.id)]
+
+        names = ["Acetone", "Ethanol", "Methanol", "Toluene", "Hexane", "Sodium Chloride",
+                 "Sulfuric Acid", "Hydrochloric Acid", "Sodium Hydroxide", "Benzene"]
+        db.execute(insert(models.Chemical_catalogue), [
+            {
+                "chemical_name": f"{rng.choice(names)} {i}", "cas": f"{rng.randint(50, 9999)}-{rng.randint(10, 99)}-{i % 10}",
+                "barcode": f"BENCH{i:07d}", "quantity": round(rng.uniform(1, 1000), 2),
+                "unit": rng.choice(["g", "mL", "kg", "L"]), "supplier": rng.choice(["Sigma", "Merck", "VWR"]),
+                "department": f"Department {i % 5}", "location_id": rng.choice(location_ids),
+                "purchase_date": date(2024, 1, 1) + timedelta(days=rng.randint(0, 365)),
+                "expiry_date": date.today() + timedelta(days=rng.randint(-60, 1500)),
+                "status": "active", "created_by": rng.choice(user_ids), "edited_by": rng.choice(user_ids),
+            }
+            for i in range(chemicals)
+        ])
+        chemical_ids = [row_id for (row_id,) in db.query(models.Chemical_catalogue.id)]
+
+        if chemical_ids:
+            db.execute(insert(models.Order), [
+                {
+                    "chemical_id": chemical_id, "chemical_name": f"Chemical {chemical_id}",
+                    "requested_by": str(requested_by), "requested_by_id": requested_by,
+                    "requested_to": str(requested_to), "requested_to_id": requested_to,
+                    "status": rng.choice(["pending", "pending", "approved", "done"]),
+                }
+                for chemical_id, requested_by, requested_to in (
+                    (rng.choice(chemical_ids), rng.choice(user_ids), rng.choice(user_ids)) for _ in range(orders)
+                )
+            ])
+        order_ids = [row_id for (row_id,) in db.query(models.Order.id)]
+
+        rebuild_rollups(db.connection())
+        db.commit()
+    finally:
+        db.close()
+
+    return {
+        "emails": emails, "user_ids": user_ids, "location_ids": location_ids, "paths": paths,
+        "chemical_ids": chemical_ids, "order_ids": order_ids, "names": names,
+    }
@@ -0,0 +1,96 @@
+"""Measure catalogue read latency while a burst of logins is in flight.
+
+Run from the backend directory:
+
+    python -m benchmarks.login_contention --logins 20 --reads 200
+
+Compare against inline hashing with PASSWORD_HASH_WORKERS=0.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+
+from benchmarks.common import create_schema, summarize, use_scratch_database
+
+use_scratch_database()
+
+import httpx  # noqa: E402
+from main import app  # noqa: E402
+
+logging.getLogger("database").setLevel(logging.WARNING)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+EMAIL = "bench@example.com"
+PASSWORD = "bench-password"
+
+
+async def timed_get(client, url, headers, samples):
+    start = time.perf_counter()
+    response = await client.get(url, headers=headers)
+    samples.append(time.perf_counter() - start)
+    response.raise_for_status()
+
+
+async def read_loop(client, headers, count, concurrency):
+    samples = []
+    queue = asyncio.Queue()
+    for _ in range(count):
+        queue.put_nowait(None)
+
+    async def worker():
+        while not queue.empty():
+            queue.get_nowait()
+            await timed_get(client, "/chemical-catalogue/?limit=50", headers, samples)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples
+
+
+async def login(client, samples):
+    start = time.perf_counter()
+    response = await client.post("/auth/token", data={"username": EMAIL, "password": PASSWORD})
+    samples.append(time.perf_counter() - start)
+    response.raise_for_status()
+
+
+async def main(args):
+    create_schema()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/auth/register", json={
+            "name": "Bench", "email": EMAIL, "password": PASSWORD,
+            "department": "Bench", "role": "admin",
+        })
+        token = (await client.post("/auth/token", data={"username": EMAIL, "password": PASSWORD})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        for i in range(50):
+            await client.post("/chemical-catalogue/", headers=headers, json={
+                "chemical_name": f"Chemical {i}", "cas": f"0-0-{i}", "barcode": f"LOGIN-BENCH-{i}",
+                "quantity": 1, "unit": "g", "supplier": "Bench", "location_building": "B",
+                "location_room": "R", "location_storage": "S",
+                "purchase_date": "2024-01-01", "expiry_date": "2030-01-01",
+            })
+
+        idle_reads = await read_loop(client, headers, args.reads, args.concurrency)
+
+        login_samples = []
+        logins = asyncio.gather(*(login(client, login_samples) for _ in range(args.logins)))
+        busy_reads, _ = await asyncio.gather(read_loop(client, headers, args.reads, args.concurrency), logins)
+
+    print(json.dumps({
+        "password_hash_workers": int(os.getenv("PASSWORD_HASH_WORKERS", "2")),
+        "reads_idle": summarize(idle_reads),
+        "reads_during_logins": summarize(busy_reads),
+        "logins": summarize(login_samples),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--reads", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,110 @@
+"""Compare rows/second of the default and fast (FAST_SERIALIZATION) list paths.
+
+Run from the backend directory:
+
+    python -m benchmarks.serialization --rows 5000 --page 500 --repeat 20
+
+The default path loads ORM entities, validates them into the response
+schema and encodes with the stdlib, as FastAPI does for response_model.
+The fast path selects column tuples and encodes plain dicts with orjson.
+"""
+import argparse
+import json
+import logging
+import time
+from datetime import date
+from typing import List
+
+from benchmarks.common import create_schema, use_scratch_database
+
+use_scratch_database()
+
+import orjson  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+import models  # noqa: E402
+import schemas  # noqa: E402
+from database import SessionLocal  # noqa: E402
+from catalogue_queries import EXPORT_COLUMNS, chemical_rows  # noqa: E402
+from serialization import rows_to_dicts  # noqa: E402
+
+logging.getLogger("database").setLevel(logging.WARNING)
+
+
+def seed(rows: int):
+    create_schema()
+    db = SessionLocal()
+    try:
+        location = models.Location(location_building="B", location_room="R", location_storage="S")
+        db.add(location)
+        db.flush()
+        db.execute(insert(models.Chemical_catalogue), [
+            {
+                "chemical_name": f"Chemical {i}", "cas": f"0-0-{i}", "barcode": f"SER-BENCH-{i}",
+                "quantity": i / 7, "unit": "g", "supplier": "Bench", "location_id": location.id,
+                "purchase_date": date(2024, 1, 1), "expiry_date": date(2030, 1, 1),
+                "comment": "benchmark row", "molwt": 58.08, "status": "active",
+                "created_by": 1, "edited_by": 1,
+            }
+            for i in range(rows)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+adapter = TypeAdapter(List[schemas.ChemicalCatalogueResponse])
+
+
+def default_path(db, page: int) -> bytes:
+    rows = db.query(models.Chemical_catalogue).limit(page).all()
+    items = adapter.validate_python(rows, from_attributes=True)
+    content = adapter.dump_python(items, mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(db, page: int) -> bytes:
+    rows = chemical_rows(db).limit(page).all()
+    return orjson.dumps(rows_to_dicts(EXPORT_COLUMNS, rows))
+
+
+def measure(path, page: int, repeat: int) -> dict:
+    db = SessionLocal()
+    try:
+        path(db, page)  # warm up statement caches
+        start = time.perf_counter()
+        for _ in range(repeat):
+            body = path(db, page)
+            db.expunge_all()
+        elapsed = time.perf_counter() - start
+    finally:
+        db.close()
+    return {
+        "rows_per_second": round(page * repeat / elapsed),
+        "ms_per_page": round(elapsed / repeat * 1000, 2),
+        "bytes_per_page": len(body),
+    }
+
+
+def main(args):
+    seed(args.rows)
+    page = min(args.page, args.rows)
+    default = measure(default_path, page, args.repeat)
+    fast = measure(fast_path, page, args.repeat)
+    print(json.dumps({
+        "rows": args.rows,
+        "page": page,
+        "repeat": args.repeat,
+        "default": default,
+        "fast": fast,
+        "speedup": round(fast["rows_per_second"] / default["rows_per_second"], 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--page", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    main(parser.parse_args())
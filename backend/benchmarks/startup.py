@@ -0,0 +1,111 @@
+"""Measure how long a worker process takes to import the app and run its startup.
+
+Run from the backend directory:
+
+    python -m benchmarks.startup --runs 5 --budget-ms 800
+
+Each run is a fresh interpreter under `python -X importtime` against a scratch
+database. It first imports the framework (FastAPI, pydantic, SQLAlchemy) on
+its own, then `import main`, then runs the lifespan startup (migrations,
+background tasks). The budget applies to the app's own share, import plus
+startup, because the framework floor depends on the machine and is outside
+the app's control. Exits 1 if the median exceeds the budget, or if a module
+that is meant to load lazily was imported at startup.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.common import BACKEND_DIR, use_scratch_database
+
+# Loaded on first use rather than at import; importing any of these at startup is a regression
+LAZY_MODULES = ("jwt", "passlib", "sqlalchemy.dialects.postgresql")
+
+# Imported first on their own: their cost is the floor any app on this stack pays
+FRAMEWORK_MODULES = ("fastapi", "pydantic", "sqlalchemy.orm", "starlette.applications")
+
+CHILD = f"""
+import asyncio, json, sys, time
+start = time.perf_counter()
+import {", ".join(FRAMEWORK_MODULES)}
+framework = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def startup():
+    async with main.app.router.lifespan_context(main.app):
+        return time.perf_counter()
+
+started = asyncio.run(startup())
+json.dump({{
+    "framework_ms": (framework - start) * 1000,
+    "app_import_ms": (imported - framework) * 1000,
+    "startup_ms": (started - imported) * 1000,
+}}, sys.stdout)
+"""
+
+
+def parse_importtime(stderr: str) -> dict:
+    """{module: (self_us, cumulative_us)} from `-X importtime` output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if self_us.isdigit():
+            modules[name] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def run_once(env: dict) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    timings = json.loads(result.stdout)
+    timings["modules"] = parse_importtime(result.stderr)
+    return timings
+
+
+def main(args):
+    env = {**os.environ, "EXPIRY_SWEEP_INTERVAL_SECONDS": "0"}
+    runs = []
+    for _ in range(args.runs):
+        # A fresh database each run, so every startup creates the schema
+        env["DATABASE_PATH"] = use_scratch_database()
+        runs.append(run_once(env))
+
+    for run in runs:
+        run["app_ms"] = run["app_import_ms"] + run["startup_ms"]
+    median = sorted(runs, key=lambda run: run["app_ms"])[len(runs) // 2]
+    slowest = sorted(median["modules"].items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+    loaded_lazy = sorted({
+        name for run in runs for name in run["modules"]
+        if any(name == lazy or name.startswith(lazy + ".") for lazy in LAZY_MODULES)
+    })
+    app_ms = statistics.median(run["app_ms"] for run in runs)
+    report = {
+        "runs": args.runs,
+        "framework_ms": round(statistics.median(run["framework_ms"] for run in runs), 1),
+        "app_import_ms": round(statistics.median(run["app_import_ms"] for run in runs), 1),
+        "startup_ms": round(statistics.median(run["startup_ms"] for run in runs), 1),
+        "app_ms": round(app_ms, 1),
+        "app_ms_max": round(max(run["app_ms"] for run in runs), 1),
+        "budget_ms": args.budget_ms,
+        "within_budget": app_ms <= args.budget_ms,
+        "lazy_modules_loaded": loaded_lazy,
+        "slowest_imports_ms": {name: round(self_us / 1000, 1) for name, (self_us, _) in slowest},
+    }
+    print(json.dumps(report, indent=2))
+    return 0 if report["within_budget"] and not loaded_lazy else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=800, help="maximum median app import plus startup time")
+    parser.add_argument("--top", type=int, default=10, help="how many of the slowest imports to list")
+    sys.exit(main(parser.parse_args()))
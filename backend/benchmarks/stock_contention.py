@@ -0,0 +1,165 @@
+"""Stress concurrent withdrawals from one container and check for lost updates.
+
+Run from the backend directory:
+
+    python -m benchmarks.stock_contention --clients 16 --withdrawals 25
+    python -m benchmarks.stock_contention --stock 100        # run the container dry: extra withdrawals get 409
+    python -m benchmarks.stock_contention --mode put         # naive GET + PUT, for comparison
+
+Every client withdraws 1 unit at a time (and restocks 1 every --restock-every
+withdrawals). Afterwards the container's quantity, the ledger and the rollup
+totals must all agree with the responses the clients received. The write
+lock hold time is measured from the moment the quantity UPDATE returns (the
+lock is acquired) to COMMIT.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+
+from benchmarks.common import seed_database, summarize, use_scratch_database
+
+use_scratch_database()
+
+import httpx  # noqa: E402
+from sqlalchemy import event, func, update  # noqa: E402
+
+import models  # noqa: E402
+from auth.auth_handler import create_access_token  # noqa: E402
+from database import SessionLocal, engine  # noqa: E402
+from main import app  # noqa: E402
+from rollups import rebuild_rollups  # noqa: E402
+
+logging.getLogger("database").setLevel(logging.WARNING)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+lock_holds = []
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _note_write(conn, cursor, statement, parameters, context, executemany):
+    # SQLite holds the write lock from the first write until COMMIT
+    if statement.startswith("UPDATE chemical_catalogues") and "write_started" not in conn.info:
+        conn.info["write_started"] = time.perf_counter()
+
+
+@event.listens_for(engine, "commit")
+def _note_commit(conn):
+    started = conn.info.pop("write_started", None)
+    if started is not None:
+        lock_holds.append(time.perf_counter() - started)
+
+
+@event.listens_for(engine, "rollback")
+def _note_rollback(conn):
+    conn.info.pop("write_started", None)
+
+
+def prepare(clients: int, stock: float, rng: random.Random):
+    data = seed_database(clients, 1, 1, 0, rng)
+    chemical_id = data["chemical_ids"][0]
+    db = SessionLocal()
+    try:
+        db.execute(update(models.Chemical_catalogue).where(models.Chemical_catalogue.id == chemical_id).values(quantity=stock))
+        rebuild_rollups(db.connection())
+        db.commit()
+    finally:
+        db.close()
+    return chemical_id, [create_access_token({"sub": email}) for email in data["emails"]]
+
+
+async def withdraw_ledger(client, chemical_id, headers):
+    response = await client.post(f"/chemical-catalogue/{chemical_id}/withdraw", json={"amount": 1}, headers=headers)
+    return response.status_code
+
+
+async def withdraw_put(client, chemical_id, headers):
+    # Read-modify-write: the race the ledger endpoints exist to avoid
+    current = (await client.get(f"/chemical-catalogue/{chemical_id}", headers=headers)).json()["quantity"]
+    if current < 1:
+        return 409
+    response = await client.put(f"/chemical-catalogue/{chemical_id}", json={"quantity": current - 1}, headers=headers)
+    return response.status_code
+
+
+async def client_loop(client, chemical_id, token, args, withdraw, outcome, samples):
+    headers = {"Authorization": f"Bearer {token}"}
+    for i in range(args.withdrawals):
+        start = time.perf_counter()
+        code = await withdraw(client, chemical_id, headers)
+        samples.append(time.perf_counter() - start)
+        outcome[code] = outcome.get(code, 0) + 1
+        if args.restock_every and (i + 1) % args.restock_every == 0:
+            response = await client.post(f"/chemical-catalogue/{chemical_id}/restock", json={"amount": 1}, headers=headers)
+            outcome["restocked"] = outcome.get("restocked", 0) + (response.status_code == 200)
+
+
+def final_state(chemical_id):
+    db = SessionLocal()
+    try:
+        quantity = db.query(models.Chemical_catalogue.quantity).filter(models.Chemical_catalogue.id == chemical_id).scalar()
+        ledger = db.query(func.coalesce(func.sum(models.StockMovement.change), 0.0)).filter(
+            models.StockMovement.chemical_id == chemical_id
+        ).scalar()
+        rollup = db.query(models.InventoryRollup.total_quantity).filter(
+            models.InventoryRollup.dimension == "cas"
+        ).scalar()
+        return quantity, ledger, rollup
+    finally:
+        db.close()
+
+
+async def main(args):
+    rng = random.Random(args.seed)
+    stock = args.stock if args.stock is not None else float(args.clients * args.withdrawals)
+    chemical_id, tokens = prepare(args.clients, stock, rng)
+    withdraw = withdraw_put if args.mode == "put" else withdraw_ledger
+
+    outcome, samples = {}, []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            client_loop(client, chemical_id, tokens[i % len(tokens)], args, withdraw, outcome, samples)
+            for i in range(args.clients)
+        ))
+        elapsed = time.perf_counter() - start
+
+    withdrawn, restocked = outcome.get(200, 0), outcome.get("restocked", 0)
+    quantity, ledger, rollup = final_state(chemical_id)
+    expected = stock - withdrawn + restocked
+    report = {
+        "mode": args.mode,
+        "clients": args.clients,
+        "initial_stock": stock,
+        "withdrawals_ok": withdrawn,
+        "withdrawals_refused": outcome.get(409, 0),
+        "restocks_ok": restocked,
+        "expected_quantity": expected,
+        "final_quantity": quantity,
+        "lost_updates": round(quantity - expected),
+        "ledger_total": ledger,
+        "rollup_total": rollup,
+        "seconds": round(elapsed, 3),
+        "withdraw_latency": summarize(samples),
+        "lock_hold": summarize(lock_holds),
+    }
+    print(json.dumps(report, indent=2))
+    consistent = quantity == expected and quantity >= 0 and rollup == quantity
+    if args.mode == "ledger":
+        consistent = consistent and ledger == quantity - stock
+    return 0 if consistent else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--withdrawals", type=int, default=25, help="withdrawals of 1 unit per client")
+    parser.add_argument("--stock", type=float, help="initial quantity (default: exactly enough for every withdrawal)")
+    parser.add_argument("--restock-every", type=int, default=5, help="restock 1 unit after this many withdrawals (0 never)")
+    parser.add_argument("--mode", choices=["ledger", "put"], default="ledger")
+    parser.add_argument("--seed", type=int, default=42)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,175 @@
+"""Seed a scratch database and drive the API with a realistic request mix.
+
+Run from the backend directory:
+
+    python -m benchmarks.suite --chemicals 5000 --orders 1000 --requests 1000 --mix mixed
+    python -m benchmarks.suite --output run.json
+    python -m benchmarks.suite --compare run.json    # flag routes that regressed
+
+Requests go through the ASGI app in-process (httpx.ASGITransport), so the
+numbers cover routing, validation, the database and serialization, but not
+the network or a production server. The report is JSON with throughput and
+p50/p95/p99 per route.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+
+from benchmarks.common import BENCH_PASSWORD, RouteRecorder, seed_database, use_scratch_database
+
+use_scratch_database()
+
+import httpx  # noqa: E402
+from auth.auth_handler import create_access_token  # noqa: E402
+from main import app  # noqa: E402
+
+logging.getLogger("database").setLevel(logging.WARNING)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Relative weights of each operation per mix
+MIXES = {
+    "read": {"list": 40, "query": 25, "search": 25, "get": 10},
+    "mixed": {"list": 25, "query": 15, "search": 15, "get": 10, "order_create": 15, "order_update": 10,
+              "order_queue": 8, "login": 2},
+    "write": {"order_create": 45, "order_update": 35, "list": 10, "order_queue": 10},
+    "login": {"login": 100},
+}
+
+
+class Workload:
+    def __init__(self, data: dict, rng: random.Random, page_size: int):
+        self.data = data
+        self.rng = rng
+        self.page_size = page_size
+        self.tokens = [create_access_token({"sub": email}) for email in data["emails"]]
+
+    def headers(self):
+        return {"Authorization": f"Bearer {self.rng.choice(self.tokens)}"}
+
+    def request(self, operation: str):
+        """Return (route label, method, url, keyword arguments) for one operation."""
+        rng, data = self.rng, self.data
+        if operation == "list":
+            skip = rng.randint(0, max(len(data["chemical_ids"]) - self.page_size, 0))
+            return "GET /chemical-catalogue/", "GET", f"/chemical-catalogue/?skip={skip}&limit={self.page_size}", {}
+        if operation == "query":
+            building, room, _ = rng.choice(data["paths"])
+            params = {"location_building": building, "location_room": room, "sort_by": "expiry_date",
+                      "limit": self.page_size}
+            return "GET /chemical-catalogue/query", "GET", "/chemical-catalogue/query", {"params": params}
+        if operation == "search":
+            term = rng.choice(data["names"]).split()[0][:rng.randint(3, 6)]
+            return "GET /chemical-catalogue/search", "GET", "/chemical-catalogue/search", {
+                "params": {"q": term, "limit": self.page_size}
+            }
+        if operation == "get":
+            chemical_id = rng.choice(data["chemical_ids"])
+            return "GET /chemical-catalogue/{id}", "GET", f"/chemical-catalogue/{chemical_id}", {}
+        if operation == "order_create":
+            chemical_id = rng.choice(data["chemical_ids"])
+            return "POST /order/", "POST", "/order/", {"json": {
+                "chemical_id": chemical_id, "chemical_name": f"Chemical {chemical_id}",
+                "requested_by": str(rng.choice(data["user_ids"])),
+                "requested_to": str(rng.choice(data["user_ids"])),
+            }}
+        if operation == "order_update":
+            order_id = rng.choice(data["order_ids"])
+            return "PUT /order/{id}", "PUT", f"/order/{order_id}", {
+                "json": {"status": rng.choice(["pending", "approved", "done"])}
+            }
+        if operation == "order_queue":
+            return "GET /order/queue", "GET", "/order/queue", {
+                "params": {"requested_to": rng.choice(data["user_ids"])}
+            }
+        if operation == "login":
+            return "POST /auth/token", "POST", "/auth/token", {
+                "data": {"username": rng.choice(data["emails"]), "password": BENCH_PASSWORD}
+            }
+        raise ValueError(f"Unknown operation {operation}")
+
+
+async def run(client, workload: Workload, operations, concurrency: int, recorder: RouteRecorder):
+    queue = asyncio.Queue()
+    for operation in operations:
+        queue.put_nowait(operation)
+
+    async def worker():
+        while not queue.empty():
+            operation = queue.get_nowait()
+            route, method, url, kwargs = workload.request(operation)
+            headers = {} if operation == "login" else workload.headers()
+            start = time.perf_counter()
+            response = await client.request(method, url, headers=headers, **kwargs)
+            recorder.record(route, time.perf_counter() - start, response.status_code < 400)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    recorder.stop()
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> dict:
+    """Per-route p95 and throughput ratios against a previous report."""
+    changes = {}
+    for route, stats in current["routes"].items():
+        before = baseline.get("routes", {}).get(route)
+        if not before or not before["p95_ms"] or not before["throughput_rps"]:
+            continue
+        p95_ratio = stats["p95_ms"] / before["p95_ms"]
+        changes[route] = {
+            "p95_ratio": round(p95_ratio, 2),
+            "throughput_ratio": round(stats["throughput_rps"] / before["throughput_rps"], 2),
+            "regressed": p95_ratio > threshold,
+        }
+    return changes
+
+
+async def main(args):
+    rng = random.Random(args.seed)
+    data = seed_database(args.users, args.locations, args.chemicals, args.orders, rng)
+    workload = Workload(data, rng, args.page_size)
+    weights = MIXES[args.mix]
+    operations = rng.choices(list(weights), weights=list(weights.values()), k=args.requests)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up statement caches and the user cache outside the measured run
+        await run(client, workload, rng.choices(list(weights), k=min(50, args.requests)), args.concurrency,
+                  RouteRecorder())
+        recorder = RouteRecorder()
+        await run(client, workload, operations, args.concurrency, recorder)
+
+    report = {
+        "config": {
+            "mix": args.mix, "requests": args.requests, "concurrency": args.concurrency, "seed": args.seed,
+            "users": args.users, "locations": args.locations, "chemicals": args.chemicals,
+            "orders": args.orders, "page_size": args.page_size,
+        },
+        **recorder.report(),
+    }
+    if args.compare:
+        with open(args.compare) as baseline:
+            report["comparison"] = compare(report, json.load(baseline), args.threshold)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--locations", type=int, default=100)
+    parser.add_argument("--chemicals", type=int, default=5000)
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--mix", choices=sorted(MIXES), default="mixed")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--compare", help="previous report to compare p95 and throughput against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="p95 ratio above which a route counts as regressed")
+    asyncio.run(main(parser.parse_args()))
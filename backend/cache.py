@@ -0,0 +1,172 @@
+# cache.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Protocol
+
+# Shared backend for reference data such as departments and locations
+REFERENCE_CACHE_SIZE = int(os.getenv("REFERENCE_CACHE_SIZE", "256"))
+REFERENCE_CACHE_TTL = float(os.getenv("REFERENCE_CACHE_TTL", "300"))
+
+
+class CacheBackend(Protocol):
+    def get(self, key, default=None): ...
+    def set(self, key, value): ...
+    def invalidate_prefix(self, prefix: str): ...
+    def stats(self) -> dict: ...
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def invalidate_prefix(self, prefix: str):
+        with self._lock:
+            for key in [key for key in self._data if isinstance(key, str) and key.startswith(prefix)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class NullCache:
+    """Backend that stores nothing, for switching caching off."""
+
+    def get(self, key, default=None):
+        return default
+
+    def set(self, key, value):
+        pass
+
+    def invalidate_prefix(self, prefix: str):
+        pass
+
+    def stats(self) -> dict:
+        return {"size": 0}
+
+
+_default_backend: CacheBackend | None = None
+
+
+def default_backend() -> CacheBackend:
+    global _default_backend
+    if _default_backend is None:
+        if REFERENCE_CACHE_TTL > 0:
+            _default_backend = TTLCache(maxsize=REFERENCE_CACHE_SIZE, ttl=REFERENCE_CACHE_TTL)
+        else:
+            _default_backend = NullCache()
+    return _default_backend
+
+
+def set_default_backend(backend: CacheBackend):
+    """Swap the backend used by every ReadThroughCache without one of its own."""
+    global _default_backend
+    _default_backend = backend
+
+
+# Every ReadThroughCache by namespace, for the metrics endpoints
+caches: Dict[str, "ReadThroughCache"] = {}
+
+
+class ReadThroughCache:
+    """Namespaced read-through cache over a pluggable backend.
+
+    Meant for small, rarely changing tables that every form loads. Keys are
+    "<namespace>:<part>:..." strings, so routers can share one backend without
+    collisions, and writers call invalidate() to drop the whole namespace.
+    """
+
+    def __init__(self, namespace: str, backend: CacheBackend | None = None):
+        self.namespace = namespace
+        self._backend = backend
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.load_seconds = 0.0
+        caches[namespace] = self
+
+    @property
+    def backend(self) -> CacheBackend:
+        return self._backend or default_backend()
+
+    def key(self, *parts) -> str:
+        return ":".join([self.namespace, *(str(part) for part in parts)])
+
+    def get_or_load(self, parts: tuple, loader: Callable):
+        key = self.key(*parts)
+        missing = object()
+        value = self.backend.get(key, missing)
+        if value is not missing:
+            with self._lock:
+                self.hits += 1
+            return value
+        started = time.perf_counter()
+        value = loader()
+        with self._lock:
+            self.misses += 1
+            self.load_seconds += time.perf_counter() - started
+        self.backend.set(key, value)
+        return value
+
+    def invalidate(self):
+        self.backend.invalidate_prefix(f"{self.namespace}:")
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "load_seconds": round(self.load_seconds, 6),
+                "backend": self.backend.stats(),
+            }
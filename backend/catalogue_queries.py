@@ -0,0 +1,18 @@
+# catalogue_queries.py
+from sqlalchemy.orm import Session
+
+import models
+import schemas
+from locations import LOCATION_FIELDS
+
+EXPORT_COLUMNS = list(schemas.ChemicalCatalogueResponse.model_fields)
+
+
+def chemical_rows(db: Session, columns=EXPORT_COLUMNS):
+    """Column-tuple query over the catalogue, for exports and the fast serialization path."""
+    model = models.Chemical_catalogue
+    # Location paths come from the joined locations row rather than per-row subqueries
+    selected = [getattr(models.Location if name in LOCATION_FIELDS else model, name) for name in columns]
+    return db.query(*selected).select_from(model).outerjoin(
+        models.Location, models.Location.id == model.location_id
+    )
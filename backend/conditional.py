@@ -0,0 +1,54 @@
+# conditional.py
+import hashlib
+from datetime import date
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import models
+from database import get_read_db
+from auth.auth_handler import get_current_user
+
+
+def table_etag(db: Session, *tracked) -> str:
+    """Weak ETag over the write version of each tracked table.
+
+    Every committed INSERT, UPDATE or DELETE bumps its table's version in the
+    same transaction (versions.py), so one primary-key read tells whether a
+    listing can have changed. The date is mixed in because some responses
+    (expiry windows) depend on it.
+    """
+    names = [model.__tablename__ for model in tracked]
+    versions = dict(db.execute(
+        select(models.TableVersion.name, models.TableVersion.version).where(models.TableVersion.name.in_(names))
+    ).all())
+    version = tuple(versions.get(name) for name in names)
+    digest = hashlib.blake2b(repr((date.today(), version)).encode(), digest_size=10).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: W/"x" and "x" name the same version
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def conditional_get(*tracked):
+    """Route dependency that answers 304 Not Modified while the tracked tables are unchanged."""
+    def check_not_modified(
+        request: Request,
+        response: Response,
+        db: Session = Depends(get_read_db),
+        current_user: models.User = Depends(get_current_user)
+    ):
+        etag = table_etag(db, *tracked)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+    return check_not_modified
@@ -0,0 +1,87 @@
+# expiry.py
+import asyncio
+import logging
+import os
+from datetime import date
+from typing import Callable, List
+
+from sqlalchemy import update
+
+import audit
+import models
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# How often the sweep runs (0 disables it) and how many rows each write
+# transaction touches, which bounds how long the write lock is held
+EXPIRY_SWEEP_INTERVAL_SECONDS = float(os.getenv("EXPIRY_SWEEP_INTERVAL_SECONDS", "3600"))
+EXPIRY_SWEEP_BATCH_SIZE = int(os.getenv("EXPIRY_SWEEP_BATCH_SIZE", "500"))
+
+# Widest "expiring within N days" window a request may ask for (100 years);
+# anything past date.max would overflow
+MAX_EXPIRY_WINDOW_DAYS = 36500
+
+# Callables notified with the containers expired by each batch
+expiry_listeners: List[Callable[[List[dict]], None]] = []
+
+
+def _notify(expired: List[dict]):
+    logger.warning(
+        "%d container(s) expired: %s", len(expired),
+        ", ".join(f"{row['chemical_name']} ({row['barcode']})" for row in expired)
+    )
+    for listener in expiry_listeners:
+        try:
+            listener(expired)
+        except Exception:
+            logger.exception("Expiry listener failed")
+
+
+def expire_due_chemicals(today: date | None = None, batch_size: int = EXPIRY_SWEEP_BATCH_SIZE) -> int:
+    """Move active containers past their expiry date to "expired", one short transaction per batch."""
+    today = today or date.today()
+    model = models.Chemical_catalogue
+    total = 0
+    while True:
+        db = SessionLocal()
+        try:
+            # Seeks the (status, expiry_date) index instead of scanning the table
+            due = db.query(model.id, model.chemical_name, model.barcode, model.expiry_date).filter(
+                model.status == "active",
+                model.expiry_date < today
+            ).order_by(model.expiry_date, model.id).limit(batch_size).all()
+            if not due:
+                return total
+            # Only rows this UPDATE changed are reported: another worker's sweep
+            # may have expired some of them since they were selected
+            table = model.__table__
+            expired = db.execute(
+                update(table).where(
+                    table.c.id.in_([row.id for row in due]),
+                    table.c.status == "active"
+                ).values(status="expired").returning(
+                    table.c.id, table.c.chemical_name, table.c.barcode, table.c.expiry_date
+                )
+            ).all()
+            for row in expired:
+                audit.record(db, model.__tablename__, row.id, audit.UPDATE, {"status": "active"}, {"status": "expired"})
+            db.commit()
+        finally:
+            db.close()
+        total += len(expired)
+        if expired:
+            _notify([row._asdict() for row in expired])
+        if len(due) < batch_size:
+            return total
+
+
+async def run_expiry_scheduler(interval: float = EXPIRY_SWEEP_INTERVAL_SECONDS):
+    while True:
+        try:
+            expired = await asyncio.to_thread(expire_due_chemicals)
+            if expired:
+                logger.info("Expiry sweep marked %d container(s) as expired", expired)
+        except Exception:
+            logger.exception("Expiry sweep failed")
+        await asyncio.sleep(interval)
@@ -0,0 +1,48 @@
+# fts.py
+from sqlalchemy import inspect, text
+
+FTS_TABLE = "chemical_catalogue_fts"
+
+# External-content FTS5 table over the catalogue. The trigram tokenizer lets
+# MATCH answer substring queries such as "acet" or "64-1" from the index.
+FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        chemical_name, cas, supplier, comment,
+        content='chemical_catalogues', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS chemical_catalogue_fts_ai AFTER INSERT ON chemical_catalogues BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, chemical_name, cas, supplier, comment)
+        VALUES (new.id, new.chemical_name, new.cas, new.supplier, new.comment);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS chemical_catalogue_fts_ad AFTER DELETE ON chemical_catalogues BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, chemical_name, cas, supplier, comment)
+        VALUES ('delete', old.id, old.chemical_name, old.cas, old.supplier, old.comment);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS chemical_catalogue_fts_au AFTER UPDATE OF chemical_name, cas, supplier, comment ON chemical_catalogues BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, chemical_name, cas, supplier, comment)
+        VALUES ('delete', old.id, old.chemical_name, old.cas, old.supplier, old.comment);
+        INSERT INTO {FTS_TABLE}(rowid, chemical_name, cas, supplier, comment)
+        VALUES (new.id, new.chemical_name, new.cas, new.supplier, new.comment);
+    END""",
+]
+
+# Trigram matching needs at least three characters per search term
+MIN_TERM_LENGTH = 3
+
+
+def ensure_chemical_search_index(engine):
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        if inspect(conn).has_table(FTS_TABLE):
+            return
+        for statement in FTS_DDL:
+            conn.execute(text(statement))
+        # Index rows that existed before the search table was added
+        conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def build_match_query(q: str) -> str:
+    # Quote every term so user input is never parsed as FTS5 query syntax
+    terms = [term.replace('"', '""') for term in q.split()]
+    return " AND ".join(f'"{term}"' for term in terms if len(term) >= MIN_TERM_LENGTH)
@@ -0,0 +1,49 @@
+# importer.py
+import codecs
+import csv
+import json
+from typing import BinaryIO, Iterator, Tuple
+
+from pydantic import ValidationError
+
+SUPPORTED_FORMATS = ("csv", "ndjson")
+
+
+def detect_format(filename: str | None, content_type: str | None) -> str | None:
+    name = (filename or "").lower()
+    if name.endswith(".csv") or content_type == "text/csv":
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or content_type in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+
+def iter_records(fileobj: BinaryIO, fmt: str) -> Iterator[Tuple[int, dict | None, str | None]]:
+    """Yield (row number, record, parse error) from an upload one line at a time."""
+    lines = codecs.getreader("utf-8-sig")(fileobj)
+    if fmt == "csv":
+        for row_number, row in enumerate(csv.DictReader(lines), start=1):
+            # Empty CSV cells mean "not given", not an empty string
+            yield row_number, {k: v for k, v in row.items() if k and v not in ("", None)}, None
+        return
+    row_number = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield row_number, None, f"Invalid JSON: {exc.msg}"
+            continue
+        if not isinstance(record, dict):
+            yield row_number, None, "Expected a JSON object"
+            continue
+        yield row_number, record, None
+
+
+def format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+        for error in exc.errors()
+    )
@@ -0,0 +1,97 @@
+# locations.py
+from sqlalchemy import tuple_
+
+import audit
+import models
+from database import dialect_insert
+from cache import ReadThroughCache
+
+LOCATION_FIELDS = ("location_building", "location_room", "location_storage")
+
+LOCATION_NOT_FOUND = "Location not found"
+LOCATION_REQUIRED = "location_id or location_building, location_room and location_storage is required"
+
+location_cache = ReadThroughCache("location")
+
+
+def location_path(location) -> tuple:
+    """(building, room, storage) of a Location row, or all None."""
+    if location is None:
+        return (None, None, None)
+    return tuple(getattr(location, field) for field in LOCATION_FIELDS)
+
+
+def location_paths(db, ids) -> dict:
+    ids = {location_id for location_id in ids if location_id is not None}
+    if not ids:
+        return {}
+    location = models.Location
+    return {row.id: location_path(row) for row in db.query(location).filter(location.id.in_(ids))}
+
+
+def resolve_locations(db, paths, user_id: int) -> dict:
+    """Map (building, room, storage) paths to Location ids, creating the missing ones."""
+    paths = set(paths)
+    if not paths:
+        return {}
+    location = models.Location
+    columns = [getattr(location, field) for field in LOCATION_FIELDS]
+
+    def lookup(wanted):
+        rows = db.query(location.id, *columns).filter(tuple_(*columns).in_(list(wanted)))
+        return {tuple(row[1:]): row.id for row in rows}
+
+    found = lookup(paths)
+    missing = paths - found.keys()
+    if missing:
+        # A concurrent request may create the same location; the hierarchy index keeps one
+        stmt = dialect_insert(db.get_bind())(location).on_conflict_do_nothing(index_elements=list(LOCATION_FIELDS))
+        rows = [
+            {**dict(zip(LOCATION_FIELDS, path)), "created_by": user_id, "edited_by": user_id}
+            for path in missing
+        ]
+        db.execute(stmt, rows)
+        found.update(lookup(missing))
+        for path, row in zip(missing, rows):
+            audit.record(db, location.__tablename__, found.get(path), audit.CREATE, after=row)
+        location_cache.invalidate()
+    return found
+
+
+def assign_locations(db, payloads, user_id: int, current_paths=None) -> list:
+    """Replace the location strings in chemical payloads with a location_id.
+
+    Locations that don't exist yet are created. For patches, current_paths
+    holds each container's present path so a partial change (just the
+    storage, say) moves it within its room. Returns an error or None per payload.
+    """
+    errors = [None] * len(payloads)
+    wanted, explicit_ids = {}, set()
+    for index, payload in enumerate(payloads):
+        given = {field: payload.pop(field) for field in LOCATION_FIELDS if field in payload}
+        given = {field: value for field, value in given.items() if value is not None}
+        if payload.get("location_id") is not None:
+            explicit_ids.add(payload["location_id"])
+            continue
+        if not given:
+            if current_paths is None:
+                errors[index] = LOCATION_REQUIRED
+            continue
+        base = current_paths[index] if current_paths is not None else (None, None, None)
+        path = tuple(given.get(field, base[position]) for position, field in enumerate(LOCATION_FIELDS))
+        if None in path:
+            errors[index] = LOCATION_REQUIRED
+            continue
+        wanted[index] = path
+
+    if explicit_ids:
+        location = models.Location
+        existing = {row_id for (row_id,) in db.query(location.id).filter(location.id.in_(explicit_ids))}
+        for index, payload in enumerate(payloads):
+            if payload.get("location_id") is not None and payload["location_id"] not in existing:
+                errors[index] = LOCATION_NOT_FOUND
+
+    resolved = resolve_locations(db, wanted.values(), user_id)
+    for index, path in wanted.items():
+        payloads[index]["location_id"] = resolved[path]
+    return errors
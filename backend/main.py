@@ -1,12 +1,50 @@
 # main.py
-import uvicorn
+import asyncio
+import os
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
     
 # Import our new routers
-from routers import auth, user, chemical_catalogue, location, order, department
+from routers import auth, user, chemical_catalogue, location, order, department, inventory, audit, metrics
+from audit import audit_writer, run_audit_writer
+from database import dispose_engines, engine
+from expiry import EXPIRY_SWEEP_INTERVAL_SECONDS, run_expiry_scheduler
+from metrics import METRICS_ENABLED, MetricsMiddleware
+from migrations import MIGRATE_ON_STARTUP, run_migrations
+from serialization import FAST_SERIALIZATION
 
-app = FastAPI(debug=True)
+
+# Tracebacks in error responses; serve.py turns this off for production
+DEBUG = os.getenv("DEBUG", "1").lower() in ("1", "true", "yes")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if MIGRATE_ON_STARTUP:
+        await asyncio.to_thread(run_migrations, engine)
+    expiry_task = None
+    if EXPIRY_SWEEP_INTERVAL_SECONDS > 0:
+        expiry_task = asyncio.create_task(run_expiry_scheduler())
+    audit_task = asyncio.create_task(run_audit_writer())
+    yield
+    for task in (expiry_task, audit_task):
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    # Write out audit entries queued since the last flush
+    await asyncio.to_thread(audit_writer.flush)
+    # Close pooled connections on shutdown
+    dispose_engines()
+
+
+app = FastAPI(
+    debug=DEBUG,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse if FAST_SERIALIZATION else JSONResponse
+)
 
 origins = [
     "http://localhost:5173",
@@ -20,8 +58,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+if METRICS_ENABLED:
+    # Added last so it wraps CORS too and times the whole request
+    app.add_middleware(MetricsMiddleware)
+
 # Include our new routers
 app.include_router(auth.router, prefix="/auth")
 app.include_router(user.router)
@@ -29,6 +72,12 @@ app.include_router(chemical_catalogue.router)
 app.include_router(location.router)
 app.include_router(order.router)
 app.include_router(department.router)
+app.include_router(inventory.router)
+app.include_router(audit.router)
+if METRICS_ENABLED:
+    app.include_router(metrics.router)
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(app, host="127.0.0.1", port=8000)
@@ -0,0 +1,211 @@
+# metrics.py
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").lower() in ("1", "true", "yes")
+# Log statements slower than this many milliseconds; 0 disables the log
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))
+
+# Request latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestStats:
+    """SQL work done while serving one request."""
+
+    __slots__ = ("statements", "sql_seconds", "rows")
+
+    def __init__(self):
+        self.statements = 0
+        self.sql_seconds = 0.0
+        self.rows = 0
+
+
+# Set by the middleware; the threadpool copies the context, so sync endpoints
+# and dependencies add to the same object as the request that spawned them
+current_request = ContextVar("current_request", default=None)
+
+
+class RouteMetrics:
+    """Per-route counters and latency histograms, rendered in Prometheus text format."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._requests = defaultdict(int)
+        self._latency = defaultdict(lambda: [0] * (len(self.buckets) + 1))
+        self._latency_sum = defaultdict(float)
+        self._statements = defaultdict(int)
+        self._sql_seconds = defaultdict(float)
+        self._rows = defaultdict(int)
+
+    def observe(self, method: str, route: str, status: int, seconds: float, stats: RequestStats):
+        key = (method, route)
+        with self._lock:
+            self._requests[key + (str(status),)] += 1
+            self._latency[key][bisect_left(self.buckets, seconds)] += 1
+            self._latency_sum[key] += seconds
+            self._statements[key] += stats.statements
+            self._sql_seconds[key] += stats.sql_seconds
+            self._rows[key] += stats.rows
+
+    def reset(self):
+        with self._lock:
+            for series in (self._requests, self._latency, self._latency_sum,
+                           self._statements, self._sql_seconds, self._rows):
+                series.clear()
+
+    def render(self) -> str:
+        with self._lock:
+            requests = dict(self._requests)
+            latency = {key: list(counts) for key, counts in self._latency.items()}
+            latency_sum = dict(self._latency_sum)
+            counters = [
+                ("db_statements_total", "counter", "SQL statements executed", dict(self._statements)),
+                ("db_statement_seconds_total", "counter", "Time spent executing SQL", dict(self._sql_seconds)),
+                ("db_rows_total", "counter", "Rows fetched or affected by SQL", dict(self._rows)),
+            ]
+
+        lines = [
+            "# HELP http_requests_total Requests served, by route and status",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), count in sorted(requests.items()):
+            lines.append(f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {count}')
+
+        lines += [
+            "# HELP http_request_duration_seconds Request wall time, by route",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), counts in sorted(latency.items()):
+            labels = f'method="{method}",route="{_escape(route)}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {latency_sum[(method, route)]:.6f}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {cumulative}")
+
+        for name, kind, help_text, series in counters:
+            lines += [f"# HELP {name} {help_text}, by route", f"# TYPE {name} {kind}"]
+            for (method, route), value in sorted(series.items()):
+                value = f"{value:.6f}" if isinstance(value, float) else value
+                lines.append(f'{name}{{method="{method}",route="{_escape(route)}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+route_metrics = RouteMetrics()
+
+
+class _CountingCursor:
+    """Proxy over a DBAPI cursor that adds fetched rows to the request's stats."""
+
+    def __init__(self, cursor, stats: RequestStats):
+        self._cursor = cursor
+        self._stats = stats
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._stats.rows += 1
+        return row
+
+    def fetchmany(self, *args):
+        rows = self._cursor.fetchmany(*args)
+        self._stats.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._stats.rows += len(rows)
+        return rows
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the statement's execution context, not the pooled connection: a
+    # statement that fails never reaches after_cursor_execute
+    if context is not None:
+        context.metrics_started = time.perf_counter()
+
+
+def _end_statement(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "metrics_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+        logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, " ".join(statement.split()))
+    stats = current_request.get()
+    if stats is None:
+        return
+    stats.statements += 1
+    stats.sql_seconds += elapsed
+    if cursor.description is None:
+        stats.rows += max(cursor.rowcount, 0)
+    elif context is not None:
+        # Rows come back as the result is fetched, after this hook returns
+        context.cursor = _CountingCursor(cursor, stats)
+
+
+if METRICS_ENABLED or SLOW_QUERY_MS:
+    # Engine-class listeners cover every engine: primary and read replica
+    event.listen(Engine, "before_cursor_execute", _start_statement)
+    event.listen(Engine, "after_cursor_execute", _end_statement)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording wall time and SQL work per route template."""
+
+    def __init__(self, app):
+        self.app = app
+        self._routes = None
+
+    def route_template(self, scope) -> str:
+        if self._routes is None:
+            self._routes = {
+                getattr(route, "endpoint", None): route.path
+                for route in scope["app"].routes if hasattr(route, "path")
+            }
+        # Unmatched paths share one label so scanners cannot blow up cardinality
+        return self._routes.get(scope.get("endpoint"), "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            route_metrics.observe(
+                scope["method"], self.route_template(scope), status_code, time.perf_counter() - start, stats
+            )
@@ -0,0 +1,140 @@
+# migrations.py
+import logging
+import os
+
+from sqlalchemy import inspect, text, update
+from sqlalchemy.schema import CreateColumn
+
+from models import Base
+from fts import ensure_chemical_search_index
+from rollups import ensure_rollups, rebuild_rollups
+from versions import ensure_order_queue_versions, ensure_table_versions
+
+logger = logging.getLogger(__name__)
+
+# Migrate from the app's lifespan. Turn off where migrations run as a separate
+# deploy step (python migrations.py) so workers don't all race to ALTER tables.
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "1").lower() in ("1", "true", "yes")
+
+
+def _backfill_order_user_ids(conn, column):
+    # Legacy rows hold either a user id or a user name in the string field
+    source = "requested_by" if column == "requested_by_id" else "requested_to"
+    conn.execute(text(
+        f"UPDATE orders SET {column} = COALESCE("
+        f"(SELECT id FROM users WHERE CAST(users.id AS TEXT) = orders.{source}), "
+        f"(SELECT id FROM users WHERE users.name = orders.{source} ORDER BY users.id LIMIT 1)"
+        f") WHERE {column} IS NULL"
+    ))
+
+
+def _backfill_edited_at(conn, column):
+    conn.execute(text("UPDATE departments SET edited_at = created_at"))
+
+
+LEGACY_LOCATION_COLUMNS = ("location_building", "location_room", "location_storage")
+
+
+def _drop_columns(conn, table, columns):
+    inspector = inspect(conn)
+    for index in inspector.get_indexes(table):
+        if set(index["column_names"]) & set(columns):
+            conn.execute(text(f"DROP INDEX {index['name']}"))
+    existing = {column["name"] for column in inspector.get_columns(table)}
+    for column in columns:
+        if column in existing:
+            conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {column}"))
+
+
+def _normalize_chemical_locations(conn, column):
+    # Containers used to repeat their location strings. Point each at a single
+    # deduplicated locations row instead and drop the copies. Paths may be
+    # partial (any part NULL), so parts are compared NULL-safely.
+    columns = ", ".join(LEGACY_LOCATION_COLUMNS)
+    same = "IS" if conn.dialect.name == "sqlite" else "IS NOT DISTINCT FROM"
+    matches = " AND ".join(f"l.{name} {same} chemical_catalogues.{name}" for name in LEGACY_LOCATION_COLUMNS)
+    located = "(" + " OR ".join(f"{name} IS NOT NULL" for name in LEGACY_LOCATION_COLUMNS) + ")"
+    conn.execute(text(
+        f"DELETE FROM locations WHERE id NOT IN (SELECT min(id) FROM locations GROUP BY {columns})"
+    ))
+    conn.execute(text(
+        f"INSERT INTO locations ({columns}, created_by, edited_by) "
+        f"SELECT {columns}, min(created_by), min(created_by) FROM chemical_catalogues "
+        f"WHERE {located} AND NOT EXISTS (SELECT 1 FROM locations l WHERE {matches}) "
+        f"GROUP BY {columns}"
+    ))
+    conn.execute(text(
+        f"UPDATE chemical_catalogues SET location_id = (SELECT min(l.id) FROM locations l WHERE {matches}) "
+        f"WHERE {located}"
+    ))
+    unlinked = conn.execute(text(
+        f"SELECT count(*) FROM chemical_catalogues WHERE {located} AND location_id IS NULL"
+    )).scalar()
+    if unlinked:
+        # Dropping the columns now would lose these containers' locations for good
+        raise RuntimeError(f"{unlinked} container(s) could not be linked to a location; not dropping {columns}")
+    _drop_columns(conn, "chemical_catalogues", LEGACY_LOCATION_COLUMNS)
+    # Location rollups are now grouped by location id
+    rebuild_rollups(conn)
+
+
+# Data backfills to run right after a column has been added to an existing table
+COLUMN_BACKFILLS = {
+    ("orders", "requested_by_id"): _backfill_order_user_ids,
+    ("orders", "requested_to_id"): _backfill_order_user_ids,
+    ("departments", "edited_at"): _backfill_edited_at,
+    ("chemical_catalogues", "location_id"): _normalize_chemical_locations,
+}
+
+
+def add_missing_columns(conn):
+    """ALTER existing tables to add columns that were added to the models since."""
+    inspector = inspect(conn)
+    added = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            default = column.server_default
+            if conn.dialect.name == "sqlite" and default is not None and not isinstance(default.arg, str):
+                # SQLite can't ADD COLUMN with an expression default such as
+                # CURRENT_TIMESTAMP, so add it bare and fill existing rows instead
+                ddl = f"{column.name} {column.type.compile(dialect=conn.dialect)}"
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+                conn.execute(update(table).values({column.name: default.arg}))
+            else:
+                ddl = CreateColumn(column).compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+            logger.info("Added column %s.%s", table.name, column.name)
+            added.append((table.name, column.name))
+    for table_name, column_name in added:
+        backfill = COLUMN_BACKFILLS.get((table_name, column_name))
+        if backfill is not None:
+            backfill(conn, column_name)
+    return added
+
+
+def run_migrations(engine):
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        add_missing_columns(conn)
+
+    # create_all skips indexes on tables that already exist, so make sure
+    # indexes added after a database was first created are present as well
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+    ensure_chemical_search_index(engine)
+    ensure_rollups(engine)
+    ensure_table_versions(engine)
+    ensure_order_queue_versions(engine)
+
+
+if __name__ == "__main__":
+    from database import engine
+
+    run_migrations(engine)
@@ -1,7 +1,8 @@
 # models.py
-from sqlalchemy import Column, Integer, String, Boolean, Text, DateTime, ForeignKey, Table, BigInteger, Float, Date
+from sqlalchemy import Column, Integer, String, Boolean, Text, DateTime, ForeignKey, Table, BigInteger, Float, Date, Index, UniqueConstraint, JSON, select
 from datetime import datetime
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -20,7 +21,7 @@ class User(Base):
     contact_person = Column(Boolean, default=False)
     role = Column(String)
     created_at = Column(DateTime, server_default=func.now())
-    edited_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    edited_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), index=True)
 
     # Relationships
     # locations = relationship("Location", back_populates="created_by_user")
@@ -31,7 +32,10 @@ class Department(Base):
     __tablename__ = "departments"
     id = Column(Integer, primary_key=True, index=True)
     department_name = Column(String, index=True)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    edited_by = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime, server_default=func.now())
+    edited_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), index=True)
 
 class Location(Base):
     __tablename__ = "locations"
@@ -43,13 +47,31 @@ class Location(Base):
     created_by = Column(Integer, ForeignKey("users.id"))
     edited_by = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, server_default=func.now())
-    edited_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    edited_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), index=True)
+
+    # One row per building/room/storage path; containers reference it by id
+    __table_args__ = (
+        Index("ix_locations_hierarchy", "location_building", "location_room", "location_storage", unique=True),
+    )
 
     # Relationships
     # created_by_user = relationship("User", foreign_keys=[created_by], back_populates="locations")
     # edited_by_user = relationship("User", foreign_keys=[edited_by])
     # chemicals = relationship("Chemical_catalogue", back_populates="location")
 
+def _location_field(name):
+    # Read through Chemical_catalogue.location on instances, and as a
+    # correlated subquery in SQL so the field can still be sorted on
+    def getter(self):
+        return getattr(self.location, name) if self.location is not None else None
+
+    def expression(cls):
+        return select(getattr(Location, name)).where(
+            Location.id == cls.location_id
+        ).correlate_except(Location).scalar_subquery()
+
+    return hybrid_property(getter, expr=expression)
+
 class Chemical_catalogue(Base):
     __tablename__ = "chemical_catalogues"
     id = Column(Integer, primary_key=True, index=True)
@@ -60,9 +82,7 @@ class Chemical_catalogue(Base):
     unit = Column(String)
     supplier = Column(String)
     department = Column(String)
-    location_building = Column(String, index=True)
-    location_room = Column(String, index=True)
-    location_storage = Column(String, index=True)
+    location_id = Column(Integer, ForeignKey("locations.id"), index=True)
     purchase_date = Column(Date)
     expiry_date = Column(Date)
     comment = Column(String, nullable=True)
@@ -71,27 +91,113 @@ class Chemical_catalogue(Base):
     created_by = Column(Integer, ForeignKey("users.id"))
     edited_by = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, server_default=func.now())
-    edited_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    edited_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), index=True)
+
+    # Composite indexes backing the filtered catalogue query
+    __table_args__ = (
+        Index("ix_chemical_catalogues_department_status", "department", "status"),
+        Index("ix_chemical_catalogues_status_name", "status", "chemical_name"),
+        Index("ix_chemical_catalogues_supplier_name", "supplier", "chemical_name"),
+        Index("ix_chemical_catalogues_expiry_date", "expiry_date"),
+        Index("ix_chemical_catalogues_status_expiry", "status", "expiry_date"),
+    )
+
+    location = relationship("Location", lazy="joined")
+    location_building = _location_field("location_building")
+    location_room = _location_field("location_room")
+    location_storage = _location_field("location_storage")
+
     # Relationships
     # created_by_user = relationship("User", foreign_keys=[created_by], back_populates="chemicals")
     # edited_by_user = relationship("User", foreign_keys=[edited_by])
-    # location = relationship("Location", back_populates="chemicals", 
-    #                       primaryjoin="and_(Chemical_catalogue.location_building==Location.location_building, "
-    #                                  "Chemical_catalogue.location_room==Location.location_room, "
-    #                                  "Chemical_catalogue.location_self==Location.location_self)")
     # orders = relationship("Order", back_populates="chemical")
 
+class StockMovement(Base):
+    # Append-only ledger of quantity changes; quantity_after is the container's
+    # quantity once the movement was applied, in the container's unit
+    __tablename__ = "stock_movements"
+    id = Column(Integer, primary_key=True, index=True)
+    chemical_id = Column(Integer, ForeignKey("chemical_catalogues.id"), nullable=False)
+    kind = Column(String, nullable=False)
+    change = Column(Float, nullable=False)
+    quantity_after = Column(Float, nullable=False)
+    unit = Column(String)
+    comment = Column(String, nullable=True)
+    created_by = Column(Integer, ForeignKey("users.id"))
+    created_at = Column(DateTime, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_stock_movements_chemical", "chemical_id", "id"),
+    )
+
+class AuditLog(Base):
+    # Append-only change history. changes maps each field to [before, after];
+    # user_id is deliberately not a foreign key so entries outlive the user
+    __tablename__ = "audit_log"
+    id = Column(Integer, primary_key=True, index=True)
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer)
+    action = Column(String, nullable=False)
+    changes = Column(JSON, nullable=False)
+    user_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_audit_log_entity", "entity", "entity_id", "id"),
+        Index("ix_audit_log_user", "user_id", "id"),
+        Index("ix_audit_log_created_at", "created_at"),
+    )
+
+class InventoryRollup(Base):
+    # Running container counts and quantity totals per group, kept up to date
+    # by the catalogue write paths so the dashboard never scans containers.
+    # dimension is "department", "location" (group_key=Location.id),
+    # "cas" or "expiry" (group_key=ISO expiry date).
+    __tablename__ = "inventory_rollups"
+    id = Column(Integer, primary_key=True, index=True)
+    dimension = Column(String, nullable=False)
+    group_key = Column(String, nullable=False, default="")
+    sub_key = Column(String, nullable=False, default="")
+    unit = Column(String, nullable=False, default="")
+    container_count = Column(Integer, nullable=False, default=0)
+    total_quantity = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        UniqueConstraint("dimension", "group_key", "sub_key", "unit", name="uq_inventory_rollups_group"),
+    )
+
+class TableVersion(Base):
+    # Write counter per table, bumped by database triggers (versions.py) in the
+    # writing transaction. ETags are derived from it.
+    __tablename__ = "table_versions"
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+class OrderQueueVersion(Base):
+    # Write counter per order handler, bumped by database triggers (versions.py)
+    # in the writing transaction. GET /order/queue long-polls on it.
+    __tablename__ = "order_queue_versions"
+    requested_to_id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
 class Order(Base):
     __tablename__ = "orders"
     id = Column(Integer, primary_key=True, index=True)
-    chemical_id = Column(Integer, ForeignKey("chemical_catalogues.id"))
+    chemical_id = Column(Integer, ForeignKey("chemical_catalogues.id"), index=True)
     chemical_name = Column(String)
     requested_by = Column(String)
     requested_to = Column(String)
+    requested_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    requested_to_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     comment = Column(String, nullable=True)
-    status = Column(String, default="pending")
+    status = Column(String, default="pending", index=True)
     created_at = Column(DateTime, server_default=func.now())
-    edited_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    edited_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), index=True)
+
+    __table_args__ = (
+        # Serves the per-handler queue: equality on both columns, ordered by id
+        Index("ix_orders_requested_to_status", "requested_to_id", "status", "id"),
+    )
 
     # Relationships
     # chemical = relationship("Chemical_catalogue")
@@ -0,0 +1,66 @@
+# notifier.py
+import asyncio
+import threading
+from collections import defaultdict
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class ChangeNotifier:
+    """Per-key change counters that async handlers can wait on.
+
+    notify() may be called from any thread (sync routes run in the threadpool);
+    each waiter is woken on its own event loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions = defaultdict(int)
+        self._waiters = defaultdict(set)
+
+    def version(self, key) -> int:
+        with self._lock:
+            return self._versions[key]
+
+    def notify(self, *keys):
+        woken = []
+        with self._lock:
+            for key in set(keys):
+                self._versions[key] += 1
+                woken.extend(self._waiters.pop(key, ()))
+        for loop, future in woken:
+            try:
+                loop.call_soon_threadsafe(_wake, future)
+            except RuntimeError:
+                # The waiter's loop has already shut down
+                pass
+
+    async def wait(self, key, version: int, timeout: float) -> int:
+        """Wait until key moves past version or timeout expires; returns the current version."""
+        loop = asyncio.get_running_loop()
+        waiter = (loop, loop.create_future())
+        with self._lock:
+            if self._versions[key] != version:
+                return self._versions[key]
+            self._waiters[key].add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1], timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(key)
+                if waiters is not None:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self._waiters[key]
+        return self.version(key)
+
+
+# Keyed by Order.requested_to_id; signalled after every committed order write.
+# Wakes this process's long-polls only; the queue version itself is kept in
+# the database (versions.py) so that every worker agrees on it.
+order_notifier = ChangeNotifier()
@@ -0,0 +1,116 @@
+# pagination.py
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Optional
+
+from fastapi import HTTPException, Response
+from sqlalchemy import String, and_, or_, type_coerce
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_by: str, descending: bool, key, row_id: int) -> str:
+    payload = json.dumps([sort_by, descending, key, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, descending: bool):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, cursor_desc, key, row_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_sort != sort_by or cursor_desc != descending:
+        raise HTTPException(status_code=400, detail="Cursor does not match the requested sort order")
+    return key, row_id
+
+
+def sort_key_column(model, sort_by: str):
+    column = getattr(model, sort_by)
+    # SQLite keeps dates as text in whatever format they were written with, so
+    # compare against the stored text instead of a re-rendered Python value
+    if column.type.python_type in (date, datetime):
+        return type_coerce(column, String)
+    return column
+
+
+def keyset_page(query, model, cursor: str, limit: int, sort_by: str = "id", descending: bool = False):
+    """Return one page of rows after `cursor` plus the cursor for the next page.
+
+    Rows are ordered by (sort column, id), so each page is an index seek rather
+    than an OFFSET scan. An empty cursor starts from the first page. NULL sort
+    keys come first when ascending and last when descending, stated explicitly
+    because PostgreSQL orders NULLs the other way; the predicates below rely on it.
+    """
+    column = sort_key_column(model, sort_by)
+    if descending:
+        query = query.order_by(column.desc().nulls_last(), model.id.desc())
+    else:
+        query = query.order_by(column.asc().nulls_first(), model.id.asc())
+
+    if cursor:
+        key, row_id = decode_cursor(cursor, sort_by, descending)
+        if sort_by == "id":
+            query = query.filter(model.id < row_id if descending else model.id > row_id)
+        elif key is None:
+            if descending:
+                query = query.filter(column.is_(None), model.id < row_id)
+            else:
+                query = query.filter(or_(
+                    column.isnot(None),
+                    and_(column.is_(None), model.id > row_id)
+                ))
+        elif descending:
+            query = query.filter(or_(
+                column < key,
+                column.is_(None),
+                and_(column == key, model.id < row_id)
+            ))
+        else:
+            query = query.filter(or_(
+                column > key,
+                and_(column == key, model.id > row_id)
+            ))
+
+    # Works for entity queries and column-tuple queries alike: the cursor
+    # columns are appended and stripped again from each result row
+    width = len(query.column_descriptions)
+    results = query.add_columns(column.label("cursor_key"), model.id.label("cursor_id")).limit(limit + 1).all()
+    next_cursor = None
+    if len(results) > limit:
+        results = results[:limit]
+        last = results[-1]
+        next_cursor = encode_cursor(sort_by, descending, last.cursor_key, last.cursor_id)
+    if width == 1:
+        return [result[0] for result in results], next_cursor
+    return [tuple(result[:width]) for result in results], next_cursor
+
+
+def paginate(query, model, response: Response, skip: int, limit: int, cursor: Optional[str] = None):
+    """Page a list query with either offset (`skip`) or keyset (`cursor`) pagination.
+
+    Keyset mode is opt-in: pass `cursor` (empty for the first page) and follow the
+    `X-Next-Cursor` response header until it is absent.
+    """
+    if cursor is None:
+        return query.offset(skip).limit(limit).all()
+    rows, next_cursor = keyset_page(query, model, cursor, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows
+
+
+def paginate_cached(cache, query, model, schema, response: Response, skip: int, limit: int, cursor: Optional[str] = None):
+    """paginate() through a ReadThroughCache, storing each page as `schema` instances."""
+    def load():
+        rows = paginate(query, model, response, skip, limit, cursor)
+        return [schema.model_validate(row) for row in rows], response.headers.get(NEXT_CURSOR_HEADER)
+
+    # Keyed by the ETag set by conditional_get, so a cached page is never
+    # older than the table version advertised alongside it
+    rows, next_cursor = cache.get_or_load(("list", response.headers.get("ETag"), skip, limit, cursor), load)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows
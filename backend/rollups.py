@@ -0,0 +1,150 @@
+# rollups.py
+import logging
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import String, cast, delete, func, insert, literal, select, tuple_, update
+
+import models
+from database import dialect_insert
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_FIELDS = ("department", "location_id", "cas", "unit", "quantity", "expiry_date")
+# Summing in a different order moves float totals by rounding error only
+QUANTITY_TOLERANCE = 1e-6
+
+
+def rollup_snapshot(chemical) -> dict:
+    """Capture the fields that rollups group by, from an ORM row or a dict."""
+    if isinstance(chemical, dict):
+        return {field: chemical.get(field) for field in ROLLUP_FIELDS}
+    return {field: getattr(chemical, field) for field in ROLLUP_FIELDS}
+
+
+def _group_keys(values: dict):
+    unit = values["unit"] or ""
+    yield ("department", values["department"] or "", "", unit)
+    location_id = values["location_id"]
+    yield ("location", "" if location_id is None else str(location_id), "", unit)
+    yield ("cas", values["cas"] or "", "", unit)
+    expiry = values["expiry_date"]
+    if expiry is not None:
+        yield ("expiry", expiry.isoformat() if isinstance(expiry, date) else str(expiry), "", "")
+
+
+class RollupDelta:
+    """Accumulates rollup changes and applies them as one upsert per group."""
+
+    def __init__(self):
+        self.changes = defaultdict(lambda: [0, 0.0])
+
+    def add(self, values: dict, sign: int = 1):
+        quantity = values["quantity"] or 0.0
+        for key in _group_keys(values):
+            change = self.changes[key]
+            change[0] += sign
+            # Expiry groups mix units, so they only count containers
+            if key[0] != "expiry":
+                change[1] += sign * quantity
+
+    def remove(self, values: dict):
+        self.add(values, sign=-1)
+
+
+    def apply(self, db):
+        rows = [
+            {
+                "dimension": dimension, "group_key": group_key, "sub_key": sub_key, "unit": unit,
+                "container_count": count, "total_quantity": quantity,
+            }
+            for (dimension, group_key, sub_key, unit), (count, quantity) in self.changes.items()
+            if count or quantity
+        ]
+        self.changes.clear()
+        if not rows:
+            return
+        stmt = dialect_insert(db.get_bind())(models.InventoryRollup)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["dimension", "group_key", "sub_key", "unit"],
+            set_={
+                "container_count": models.InventoryRollup.container_count + stmt.excluded.container_count,
+                "total_quantity": models.InventoryRollup.total_quantity + stmt.excluded.total_quantity,
+            }
+        )
+        db.execute(stmt, rows)
+
+
+def adjust_rollup_quantity(db, values: dict, change: float):
+    """Shift quantity totals for a container that stays in its groups.
+
+    The groups already exist because the container does, so a single UPDATE
+    does the work of RollupDelta's upsert.
+    """
+    rollup = models.InventoryRollup.__table__
+    keys = [key for key in _group_keys(values) if key[0] != "expiry"]
+    db.execute(
+        update(rollup)
+        .where(tuple_(rollup.c.dimension, rollup.c.group_key, rollup.c.sub_key, rollup.c.unit).in_(keys))
+        .values(total_quantity=rollup.c.total_quantity + change)
+    )
+
+
+def _rollup_queries():
+    # One grouped SELECT per dimension, in InventoryRollup's column order
+    chemical = models.Chemical_catalogue
+    unit = func.coalesce(chemical.unit, "")
+    quantity = func.coalesce(func.sum(chemical.quantity), 0.0)
+    groupings = [
+        ("department", func.coalesce(chemical.department, ""), literal(""), unit, quantity),
+        ("location", func.coalesce(cast(chemical.location_id, String), ""), literal(""), unit, quantity),
+        ("cas", func.coalesce(chemical.cas, ""), literal(""), unit, quantity),
+        ("expiry", cast(chemical.expiry_date, String), literal(""), literal(""), literal(0.0)),
+    ]
+    for dimension, group_key, sub_key, group_unit, total in groupings:
+        query = select(
+            literal(dimension), group_key, sub_key, group_unit, func.count(chemical.id), total
+        ).group_by(group_key, sub_key, group_unit)
+        if dimension == "expiry":
+            query = query.where(chemical.expiry_date.isnot(None))
+        yield query
+
+
+def rebuild_rollups(conn):
+    """Recompute every rollup group from the catalogue."""
+    rollup = models.InventoryRollup
+    conn.execute(delete(rollup))
+    columns = ["dimension", "group_key", "sub_key", "unit", "container_count", "total_quantity"]
+    for query in _rollup_queries():
+        conn.execute(insert(rollup).from_select(columns, query))
+
+
+def rollups_in_sync(conn) -> bool:
+    """Whether the stored rollups equal a fresh aggregation of the catalogue."""
+    rollup = models.InventoryRollup
+    expected = {}
+    for query in _rollup_queries():
+        for dimension, group_key, sub_key, unit, count, total in conn.execute(query):
+            expected[(dimension, group_key, sub_key, unit)] = (count, total)
+    stored = {}
+    for row in conn.execute(select(
+        rollup.dimension, rollup.group_key, rollup.sub_key, rollup.unit, rollup.container_count, rollup.total_quantity
+    )):
+        # Groups whose last container left stay behind as zero rows
+        if row.container_count or abs(row.total_quantity) > QUANTITY_TOLERANCE:
+            stored[tuple(row[:4])] = (row.container_count, row.total_quantity)
+    if expected.keys() != stored.keys():
+        return False
+    return all(
+        count == stored[key][0] and abs(total - stored[key][1]) <= QUANTITY_TOLERANCE * max(1.0, abs(total))
+        for key, (count, total) in expected.items()
+    )
+
+
+def ensure_rollups(engine):
+    # Backfill databases that had containers before rollups existed, and
+    # repair totals that drifted from the catalogue
+    with engine.begin() as conn:
+        if not rollups_in_sync(conn):
+            logger.warning("Inventory rollups disagree with the catalogue; rebuilding them")
+            rebuild_rollups(conn)
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import datetime
+import models
+import schemas
+from audit import audit_writer
+from database import get_db
+from pagination import NEXT_CURSOR_HEADER, keyset_page
+from auth.auth_handler import get_current_user
+
+router = APIRouter(
+    prefix="/audit",
+    tags=["Audit"]
+)
+
+def _query_audit_log(db: Session, filters: dict, since, until, cursor: str, limit: int):
+    model = models.AuditLog
+    query = db.query(model).filter_by(**{field: value for field, value in filters.items() if value is not None})
+    if since is not None:
+        query = query.filter(model.created_at >= since)
+    if until is not None:
+        query = query.filter(model.created_at < until)
+    # Newest first; entity and user filters seek their (column, id) indexes
+    return keyset_page(query, model, cursor, limit, descending=True)
+
+@router.get("/", response_model=List[schemas.AuditEntryResponse])
+async def get_audit_log(
+    response: Response,
+    entity: Optional[str] = Query(None, description="Table name, e.g. chemical_catalogues, orders, users"),
+    entity_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    action: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: str = "",
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    # Write out anything still queued so a change is visible as soon as it committed.
+    # Read from the primary the writer just committed to, never a replica.
+    await run_in_threadpool(audit_writer.flush)
+    filters = {"entity": entity, "entity_id": entity_id, "user_id": user_id, "action": action}
+    entries, next_cursor = await run_in_threadpool(_query_audit_log, db, filters, since, until, cursor, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return entries
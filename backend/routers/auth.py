@@ -5,12 +5,17 @@ from fastapi import Depends, HTTPException, status, APIRouter
 from sqlalchemy.orm import Session
 
 from auth.auth_handler import (
-    authenticate_user, 
+    authenticate_user_async, 
     ACCESS_TOKEN_EXPIRE_MINUTES, 
     create_access_token, 
+    get_current_user,
     get_user, 
-    get_password_hash
+    get_password_hash,
+    run_password_task,
+    user_cache
 )
+from barcodes import barcode_index
+from cache import caches
 from database import get_db
 from schemas import Token, UserCreate, UserResponse
 from models import User
@@ -26,7 +31,7 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = run_password_task(get_password_hash, user.password, db=db)
     db_user = User(
         name=user.name,
         email=user.email,
@@ -47,7 +52,7 @@ async def login_for_access_token(
         db: Session = Depends(get_db)
 ):
     # Use form_data.username as the email since OAuth2PasswordRequestForm provides username field
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user_async(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -68,3 +73,13 @@ async def login_for_access_token(
         data={"sub": user.email}, expires_delta=access_token_expires
     )
     return Token(access_token=access_token, token_type="bearer")
+
+
+@router.get("/caches")
+def cache_stats(current_user: User = Depends(get_current_user)):
+    # Read-through caches by namespace, alongside the user lookup cache and barcode map
+    return {
+        "users": user_cache.stats(),
+        "barcodes": barcode_index.stats(),
+        **{name: cache.stats() for name, cache in caches.items()},
+    }
@@ -1,46 +1,508 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import delete, func, insert, or_, select, text, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import date, timedelta
 import models
 import schemas
-from database import get_db
+from database import ReadSessionLocal, begin_write, get_db, get_read_db
+from pagination import keyset_page, paginate
+from fts import FTS_TABLE, MIN_TERM_LENGTH, build_match_query
+from importer import SUPPORTED_FORMATS, detect_format, format_validation_error, iter_records
+from exporter import EXPORT_FORMATS, iter_csv, iter_ndjson
+from rollups import ROLLUP_FIELDS, RollupDelta, rollup_snapshot
+from batch import batch_result, fail_pending, item_failed, item_ok
+from locations import LOCATION_FIELDS, LOCATION_NOT_FOUND, assign_locations, location_path, location_paths
+from conditional import conditional_get
+from serialization import FAST_SERIALIZATION, fast_response, rows_to_dicts
+from stock import RESTOCK, WITHDRAW, apply_movement
+from barcodes import resolve_barcodes
+from expiry import MAX_EXPIRY_WINDOW_DAYS
+from catalogue_queries import EXPORT_COLUMNS, chemical_rows
 from auth.auth_handler import get_current_user
+import audit
 
 router = APIRouter(
     prefix="/chemical-catalogue",
     tags=["Chemical Catalogue"]
 )
 
+# Conditional GETs answer 304 while the catalogue and the locations it names are unchanged
+chemical_etag = Depends(conditional_get(models.Chemical_catalogue, models.Location))
+
+SORTABLE_COLUMNS = {
+    "id", "chemical_name", "cas", "barcode", "quantity", "supplier", "department", "location_id",
+    "location_building", "location_room", "location_storage", "purchase_date",
+    "expiry_date", "status", "created_at", "edited_at",
+}
+
+EXACT_FILTERS = ("cas", "barcode", "supplier", "department", "status", "location_id")
+
+def apply_chemical_filters(query, filters: schemas.ChemicalCatalogueFilter):
+    model = models.Chemical_catalogue
+    for field in EXACT_FILTERS:
+        value = getattr(filters, field)
+        if value is not None:
+            query = query.filter(getattr(model, field) == value)
+    location_filters = [
+        getattr(models.Location, field) == getattr(filters, field)
+        for field in LOCATION_FIELDS if getattr(filters, field) is not None
+    ]
+    if location_filters:
+        # Resolve the path on the small locations table, then seek location_id
+        query = query.filter(model.location_id.in_(select(models.Location.id).where(*location_filters)))
+    if filters.name:
+        # Prefix match written as a range so it can use the chemical_name index
+        query = query.filter(
+            model.chemical_name >= filters.name,
+            model.chemical_name < filters.name + "\U0010ffff"
+        )
+    if filters.expiry_from is not None:
+        query = query.filter(model.expiry_date >= filters.expiry_from)
+    if filters.expiry_to is not None:
+        query = query.filter(model.expiry_date <= filters.expiry_to)
+    return query
+
+def check_chemical_sort(filters: schemas.ChemicalCatalogueFilter):
+    if filters.sort_by not in SORTABLE_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"Cannot sort by '{filters.sort_by}'")
+    if filters.sort_order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="sort_order must be 'asc' or 'desc'")
+
+def apply_chemical_sort(query, filters: schemas.ChemicalCatalogueFilter):
+    check_chemical_sort(filters)
+    model = models.Chemical_catalogue
+    column = getattr(model, filters.sort_by)
+    if filters.sort_order == "desc":
+        return query.order_by(column.desc(), model.id.desc())
+    return query.order_by(column.asc(), model.id.asc())
+
+def raise_location_error(error: str):
+    raise HTTPException(status_code=404 if error == LOCATION_NOT_FOUND else 400, detail=error)
+
 @router.post("/", response_model=schemas.ChemicalCatalogueResponse)
 def create_chemical(
     chemical: schemas.ChemicalCatalogueCreate,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
+    data = chemical.model_dump()
+    error, = assign_locations(db, [data], current_user.id)
+    if error:
+        raise_location_error(error)
     db_chemical = models.Chemical_catalogue(
-        **chemical.model_dump(),
+        **data,
         created_by=current_user.id,
         edited_by=current_user.id
     )
     db.add(db_chemical)
+    rollups = RollupDelta()
+    rollups.add(rollup_snapshot(db_chemical))
+    rollups.apply(db)
     db.commit()
     db.refresh(db_chemical)
     return db_chemical
 
-@router.get("/", response_model=List[schemas.ChemicalCatalogueResponse])
+def _insert_import_chunk(db: Session, chunk, current_user: models.User, result: schemas.ChemicalImportResult):
+    model = models.Chemical_catalogue
+    barcodes = [data["barcode"] for _, data in chunk]
+    existing = {barcode for (barcode,) in db.query(model.barcode).filter(model.barcode.in_(barcodes))}
+
+    accepted = []
+    for row_number, data in chunk:
+        if data["barcode"] in existing:
+            result.errors.append(schemas.ImportRowError(row=row_number, error="Barcode already exists"))
+            continue
+        accepted.append((row_number, data))
+    location_errors = assign_locations(db, [data for _, data in accepted], current_user.id)
+
+    rows = []
+    for (row_number, data), error in zip(accepted, location_errors):
+        if error:
+            result.errors.append(schemas.ImportRowError(row=row_number, error=error))
+            continue
+        rows.append({**data, "created_by": current_user.id, "edited_by": current_user.id})
+    if not rows:
+        db.commit()
+        return
+
+    rollups = RollupDelta()
+    for row in rows:
+        rollups.add(rollup_snapshot(row))
+    try:
+        new_ids = db.execute(insert(model).returning(model.id, sort_by_parameter_order=True), rows).scalars().all()
+        for new_id, row in zip(new_ids, rows):
+            audit.record(db, model.__tablename__, new_id, audit.CREATE, after=row)
+        rollups.apply(db)
+        db.commit()
+    except IntegrityError as exc:
+        db.rollback()
+        for (row_number, data), error in zip(accepted, location_errors):
+            if not error:
+                result.errors.append(schemas.ImportRowError(row=row_number, error=str(exc.orig)))
+        return
+    result.inserted += len(rows)
+
+@router.post("/import", response_model=schemas.ChemicalImportResult)
+def import_chemicals(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, description="csv or ndjson, detected from the file name when omitted"),
+    chunk_size: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    fmt = format or detect_format(file.filename, file.content_type)
+    if fmt not in SUPPORTED_FORMATS:
+        raise HTTPException(status_code=400, detail="Upload must be CSV or NDJSON")
+
+    result = schemas.ChemicalImportResult()
+    seen_barcodes = set()
+    chunk = []
+    for row_number, record, error in iter_records(file.file, fmt):
+        if error is None:
+            try:
+                data = schemas.ChemicalCatalogueCreate.model_validate(record).model_dump()
+            except ValidationError as exc:
+                error = format_validation_error(exc)
+        if error is None and data["barcode"] in seen_barcodes:
+            error = "Duplicate barcode in upload"
+        if error is not None:
+            result.errors.append(schemas.ImportRowError(row=row_number, error=error))
+            continue
+
+        seen_barcodes.add(data["barcode"])
+        chunk.append((row_number, data))
+        if len(chunk) >= chunk_size:
+            _insert_import_chunk(db, chunk, current_user, result)
+            chunk = []
+    if chunk:
+        _insert_import_chunk(db, chunk, current_user, result)
+
+    result.errors.sort(key=lambda e: e.row)
+    result.failed = len(result.errors)
+    return result
+
+def _current_rows(db: Session, ids):
+    # Full rows: rollups need the grouped fields, the audit log the before values.
+    # Read under the write lock so the deltas match what the write replaces.
+    begin_write(db)
+    table = models.Chemical_catalogue.__table__
+    return {row.id: row for row in db.execute(select(table).where(table.c.id.in_(ids)).with_for_update())}
+
+def _delete_ledgers(db: Session, chemical_ids):
+    # The stock ledger goes with its container; the audit log keeps the deletion
+    movements = models.StockMovement.__table__
+    db.execute(delete(movements).where(movements.c.chemical_id.in_(chemical_ids)))
+
+@router.post("/batch", response_model=schemas.BatchResult)
+def create_chemicals_batch(
+    batch: schemas.ChemicalBatchCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    model = models.Chemical_catalogue
+    barcodes = [item.barcode for item in batch.items]
+    taken = {barcode for (barcode,) in db.query(model.barcode).filter(model.barcode.in_(barcodes))}
+
+    payloads = [item.model_dump() for item in batch.items]
+    location_errors = assign_locations(db, payloads, current_user.id)
+
+    results, rows, row_indexes = [], [], []
+    rollups = RollupDelta()
+    for index, (item, payload) in enumerate(zip(batch.items, payloads)):
+        if location_errors[index]:
+            results.append(item_failed(index, location_errors[index]))
+            continue
+        if item.barcode in taken:
+            results.append(item_failed(index, "Barcode already exists"))
+            continue
+        taken.add(item.barcode)
+        row = {**payload, "created_by": current_user.id, "edited_by": current_user.id}
+        rollups.add(rollup_snapshot(row))
+        rows.append(row)
+        row_indexes.append(index)
+        results.append(None)
+
+    if rows:
+        try:
+            new_ids = db.execute(
+                insert(model).returning(model.id, sort_by_parameter_order=True), rows
+            ).scalars().all()
+            for new_id, row in zip(new_ids, rows):
+                audit.record(db, model.__tablename__, new_id, audit.CREATE, after=row)
+            rollups.apply(db)
+            db.commit()
+        except IntegrityError as exc:
+            db.rollback()
+            new_ids = [None] * len(rows)
+            for index in row_indexes:
+                results[index] = item_failed(index, str(exc.orig))
+        else:
+            for index, new_id in zip(row_indexes, new_ids):
+                results[index] = item_ok(index, new_id)
+    return batch_result(results)
+
+@router.patch("/batch", response_model=schemas.BatchResult)
+def update_chemicals_batch(
+    batch: schemas.ChemicalBatchUpdate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    model = models.Chemical_catalogue
+    existing = _current_rows(db, [item.id for item in batch.items])
+    new_barcodes = [item.patch.barcode for item in batch.items if item.patch.barcode is not None]
+    barcode_owners = dict(db.query(model.barcode, model.id).filter(model.barcode.in_(new_barcodes)))
+
+    patches = [item.patch.model_dump(exclude_unset=True) for item in batch.items]
+    paths = location_paths(db, (row.location_id for row in existing.values()))
+    current_paths = [
+        paths.get(existing[item.id].location_id, (None, None, None)) if item.id in existing else (None, None, None)
+        for item in batch.items
+    ]
+    location_errors = assign_locations(db, patches, current_user.id, current_paths)
+
+    results, rows, seen_ids = [], [], set()
+    rollups = RollupDelta()
+    for index, (item, patch) in enumerate(zip(batch.items, patches)):
+        current = existing.get(item.id)
+        if current is None:
+            results.append(item_failed(index, "Chemical not found", item.id))
+            continue
+        if item.id in seen_ids:
+            results.append(item_failed(index, "Chemical appears more than once in the batch", item.id))
+            continue
+        if location_errors[index]:
+            results.append(item_failed(index, location_errors[index], item.id))
+            continue
+        changes = {field: value for field, value in patch.items() if hasattr(model, field)}
+        barcode = changes.get("barcode")
+        if barcode is not None and barcode_owners.setdefault(barcode, item.id) != item.id:
+            results.append(item_failed(index, "Barcode already exists", item.id))
+            continue
+
+        seen_ids.add(item.id)
+        before = rollup_snapshot(current)
+        rollups.remove(before)
+        rollups.add({**before, **{field: changes[field] for field in ROLLUP_FIELDS if field in changes}})
+        rows.append({"id": item.id, **changes, "edited_by": current_user.id})
+        results.append(item_ok(index, item.id))
+        current_values = audit.column_values(current)
+        audit.record(db, model.__tablename__, item.id, audit.UPDATE, current_values, {**current_values, **rows[-1]})
+
+    if rows:
+        try:
+            # Bulk UPDATE by primary key, executed as batched executemany
+            db.execute(update(model), rows)
+            rollups.apply(db)
+            db.commit()
+        except IntegrityError as exc:
+            db.rollback()
+            fail_pending(results, str(exc.orig))
+    return batch_result(results)
+
+@router.post("/batch/delete", response_model=schemas.BatchResult)
+def delete_chemicals_batch(
+    batch: schemas.BatchDelete,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    model = models.Chemical_catalogue
+    existing = _current_rows(db, batch.ids)
+
+    results, deleted = [], set()
+    rollups = RollupDelta()
+    for index, chemical_id in enumerate(batch.ids):
+        if chemical_id not in existing or chemical_id in deleted:
+            results.append(item_failed(index, "Chemical not found", chemical_id))
+            continue
+        deleted.add(chemical_id)
+        rollups.remove(rollup_snapshot(existing[chemical_id]))
+        audit.record(db, model.__tablename__, chemical_id, audit.DELETE, before=audit.column_values(existing[chemical_id]))
+        results.append(item_ok(index, chemical_id))
+
+    if deleted:
+        rollups.apply(db)
+        _delete_ledgers(db, deleted)
+        db.query(model).filter(model.id.in_(deleted)).delete(synchronize_session=False)
+        db.commit()
+    return batch_result(results)
+
+@router.get("/", response_model=List[schemas.ChemicalCatalogueResponse], dependencies=[chemical_etag])
 def get_chemicals(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    if FAST_SERIALIZATION:
+        rows = paginate(chemical_rows(db), models.Chemical_catalogue, response, skip, limit, cursor)
+        return fast_response(response, rows_to_dicts(EXPORT_COLUMNS, rows))
+    chemicals = paginate(db.query(models.Chemical_catalogue), models.Chemical_catalogue, response, skip, limit, cursor)
+    return chemicals
+
+@router.get("/query", response_model=schemas.ChemicalCataloguePage, dependencies=[chemical_etag])
+def query_chemicals(
+    response: Response,
+    filters: schemas.ChemicalCatalogueFilter = Depends(),
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    base = chemical_rows(db) if FAST_SERIALIZATION else db.query(models.Chemical_catalogue)
+    query = apply_chemical_filters(base, filters)
+    total = apply_chemical_filters(
+        db.query(func.count(models.Chemical_catalogue.id)), filters
+    ).scalar()
+    next_cursor = None
+    if cursor is not None:
+        check_chemical_sort(filters)
+        items, next_cursor = keyset_page(
+            query, models.Chemical_catalogue, cursor, limit,
+            sort_by=filters.sort_by, descending=filters.sort_order == "desc"
+        )
+    else:
+        items = apply_chemical_sort(query, filters).offset(skip).limit(limit).all()
+    if FAST_SERIALIZATION:
+        return fast_response(response, {
+            "items": rows_to_dicts(EXPORT_COLUMNS, items), "total": total,
+            "skip": skip, "limit": limit, "next_cursor": next_cursor,
+        })
+    return schemas.ChemicalCataloguePage(
+        items=items, total=total, skip=skip, limit=limit, next_cursor=next_cursor
+    )
+
+def _stream_export(filters: schemas.ChemicalCatalogueFilter, fmt: str):
+    # The request session may be closed before the body is sent, so the
+    # stream owns its own session for as long as it is being consumed
+    db = ReadSessionLocal()
+    try:
+        query = apply_chemical_sort(apply_chemical_filters(chemical_rows(db), filters), filters)
+        rows = query.execution_options(stream_results=True).yield_per(1000)
+        writer = iter_csv if fmt == "csv" else iter_ndjson
+        yield from writer(EXPORT_COLUMNS, rows)
+    finally:
+        db.close()
+
+@router.get("/export")
+def export_chemicals(
+    filters: schemas.ChemicalCatalogueFilter = Depends(),
+    format: str = "csv",
+    current_user: models.User = Depends(get_current_user)
+):
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be 'csv' or 'ndjson'")
+    check_chemical_sort(filters)
+    return StreamingResponse(
+        _stream_export(filters, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="chemical-catalogue.{format}"'}
+    )
+
+@router.get("/search", response_model=schemas.ChemicalCataloguePage, dependencies=[chemical_etag])
+def search_chemicals(
+    q: str = Query(..., min_length=MIN_TERM_LENGTH),
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    model = models.Chemical_catalogue
+    if db.get_bind().dialect.name != "sqlite":
+        # No FTS5 outside SQLite, fall back to a substring scan
+        pattern = f"%{q}%"
+        query = db.query(model).filter(or_(
+            model.chemical_name.ilike(pattern), model.cas.ilike(pattern),
+            model.supplier.ilike(pattern), model.comment.ilike(pattern)
+        ))
+        total = query.with_entities(func.count(model.id)).scalar()
+        items = query.order_by(model.chemical_name, model.id).offset(skip).limit(limit).all()
+        return schemas.ChemicalCataloguePage(items=items, total=total, skip=skip, limit=limit)
+
+    match = build_match_query(q)
+    if not match:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Search terms must be at least {MIN_TERM_LENGTH} characters"
+        )
+    total = db.execute(
+        text(f"SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"),
+        {"match": match}
+    ).scalar()
+    ids = db.execute(
+        text(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match "
+             "ORDER BY rank LIMIT :limit OFFSET :skip"),
+        {"match": match, "limit": limit, "skip": skip}
+    ).scalars().all()
+    rows = {row.id: row for row in db.query(model).filter(model.id.in_(ids)).all()}
+    items = [rows[row_id] for row_id in ids if row_id in rows]
+    return schemas.ChemicalCataloguePage(items=items, total=total, skip=skip, limit=limit)
+
+@router.get("/by-barcode/{code}", response_model=schemas.ChemicalCatalogueResponse, dependencies=[chemical_etag])
+def get_chemical_by_barcode(
+    code: str,
+    response: Response,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    row = resolve_barcodes(db, chemical_rows(db), [code]).get(code)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Chemical not found")
+    item = dict(zip(EXPORT_COLUMNS, row))
+    if FAST_SERIALIZATION:
+        return fast_response(response, item)
+    return item
+
+@router.post("/by-barcode", response_model=schemas.BarcodeLookupResult)
+def get_chemicals_by_barcode(
+    lookup: schemas.BarcodeLookup,
+    response: Response,
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    chemicals = db.query(models.Chemical_catalogue).offset(skip).limit(limit).all()
+    # A whole cart of scans in one call; items follow the order of the request
+    found = resolve_barcodes(db, chemical_rows(db), lookup.barcodes)
+    codes = list(dict.fromkeys(lookup.barcodes))
+    items = rows_to_dicts(EXPORT_COLUMNS, [found[code] for code in codes if code in found])
+    missing = [code for code in codes if code not in found]
+    if FAST_SERIALIZATION:
+        return fast_response(response, {"items": items, "missing": missing})
+    return {"items": items, "missing": missing}
+
+@router.get("/expiring", response_model=List[schemas.ChemicalCatalogueResponse], dependencies=[chemical_etag])
+def get_expiring_chemicals(
+    response: Response,
+    within_days: int = Query(30, ge=0, le=MAX_EXPIRY_WINDOW_DAYS),
+    include_expired: bool = False,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    # Active containers ordered by expiry date, served from the (status, expiry_date) index
+    model = models.Chemical_catalogue
+    today = date.today()
+    query = (chemical_rows(db) if FAST_SERIALIZATION else db.query(model)).filter(
+        model.status == "active",
+        model.expiry_date <= today + timedelta(days=within_days)
+    )
+    if not include_expired:
+        query = query.filter(model.expiry_date >= today)
+    chemicals = query.order_by(model.expiry_date, model.id).offset(skip).limit(limit).all()
+    if FAST_SERIALIZATION:
+        return fast_response(response, rows_to_dicts(EXPORT_COLUMNS, chemicals))
     return chemicals
 
-@router.get("/{chemical_id}", response_model=schemas.ChemicalCatalogueResponse)
+@router.get("/{chemical_id}", response_model=schemas.ChemicalCatalogueResponse, dependencies=[chemical_etag])
 def get_chemical(
     chemical_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
     chemical = db.query(models.Chemical_catalogue).filter(models.Chemical_catalogue.id == chemical_id).first()
@@ -55,29 +517,78 @@ def update_chemical(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    db_chemical = db.query(models.Chemical_catalogue).filter(models.Chemical_catalogue.id == chemical_id).first()
+    begin_write(db)
+    db_chemical = db.query(models.Chemical_catalogue).filter(
+        models.Chemical_catalogue.id == chemical_id
+    ).with_for_update(of=models.Chemical_catalogue).first()
     if db_chemical is None:
         raise HTTPException(status_code=404, detail="Chemical not found")
     
+    rollups = RollupDelta()
+    rollups.remove(rollup_snapshot(db_chemical))
     update_data = chemical_update.model_dump(exclude_unset=True)
+    error, = assign_locations(db, [update_data], current_user.id, [location_path(db_chemical.location)])
+    if error:
+        raise_location_error(error)
     for field, value in update_data.items():
         setattr(db_chemical, field, value)
     
     db_chemical.edited_by = current_user.id
+    rollups.add(rollup_snapshot(db_chemical))
+    rollups.apply(db)
     db.commit()
     db.refresh(db_chemical)
     return db_chemical
 
+@router.post("/{chemical_id}/withdraw", response_model=schemas.StockMovementResponse)
+def withdraw_stock(
+    chemical_id: int,
+    movement: schemas.StockMovementCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    # 409 when the container holds less than the amount; nothing is changed
+    return apply_movement(db, chemical_id, WITHDRAW, movement.amount, current_user.id, movement.comment)
+
+@router.post("/{chemical_id}/restock", response_model=schemas.StockMovementResponse)
+def restock(
+    chemical_id: int,
+    movement: schemas.StockMovementCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    return apply_movement(db, chemical_id, RESTOCK, movement.amount, current_user.id, movement.comment)
+
+@router.get("/{chemical_id}/movements", response_model=List[schemas.StockMovementResponse])
+def get_stock_movements(
+    chemical_id: int,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    # Newest first
+    return db.query(models.StockMovement).filter(
+        models.StockMovement.chemical_id == chemical_id
+    ).order_by(models.StockMovement.id.desc()).offset(skip).limit(limit).all()
+
 @router.delete("/{chemical_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_chemical(
     chemical_id: int,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    db_chemical = db.query(models.Chemical_catalogue).filter(models.Chemical_catalogue.id == chemical_id).first()
+    begin_write(db)
+    db_chemical = db.query(models.Chemical_catalogue).filter(
+        models.Chemical_catalogue.id == chemical_id
+    ).with_for_update(of=models.Chemical_catalogue).first()
     if db_chemical is None:
         raise HTTPException(status_code=404, detail="Chemical not found")
     
+    rollups = RollupDelta()
+    rollups.remove(rollup_snapshot(db_chemical))
+    rollups.apply(db)
+    _delete_ledgers(db, [chemical_id])
     db.delete(db_chemical)
     db.commit()
     return None 
\ No newline at end of file
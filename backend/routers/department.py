@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import models
 import schemas
-from database import get_db
+from database import get_db, get_read_db
+from pagination import paginate_cached
+from cache import ReadThroughCache
+from conditional import conditional_get
 from auth.auth_handler import get_current_user
 
 router = APIRouter(
@@ -11,6 +14,11 @@ router = APIRouter(
     tags=["Department"]
 )
 
+# Conditional GETs answer 304 while the departments table is unchanged
+department_etag = Depends(conditional_get(models.Department))
+
+department_cache = ReadThroughCache("department")
+
 @router.post("/", response_model=schemas.DepartmentResponse)
 def create_department(
     department: schemas.DepartmentCreate,
@@ -25,25 +33,35 @@ def create_department(
     db.add(db_department)
     db.commit()
     db.refresh(db_department)
+    department_cache.invalidate()
     return db_department
 
-@router.get("/", response_model=List[schemas.DepartmentResponse])
+@router.get("/", response_model=List[schemas.DepartmentResponse], dependencies=[department_etag])
 def get_departments(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    departments = db.query(models.Department).offset(skip).limit(limit).all()
+    departments = paginate_cached(
+        department_cache, db.query(models.Department), models.Department, schemas.DepartmentResponse, response, skip, limit, cursor
+    )
     return departments
 
-@router.get("/{department_id}", response_model=schemas.DepartmentResponse)
+@router.get("/{department_id}", response_model=schemas.DepartmentResponse, dependencies=[department_etag])
 def get_department(
     department_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    department = db.query(models.Department).filter(models.Department.id == department_id).first()
+    def load():
+        row = db.query(models.Department).filter(models.Department.id == department_id).first()
+        return None if row is None else schemas.DepartmentResponse.model_validate(row)
+
+    department = department_cache.get_or_load(("detail", response.headers.get("ETag"), department_id), load)
     if department is None:
         raise HTTPException(status_code=404, detail="Department not found")
     return department
@@ -66,6 +84,7 @@ def update_department(
     db_department.edited_by = current_user.id
     db.commit()
     db.refresh(db_department)
+    department_cache.invalidate()
     return db_department
 
 @router.delete("/{department_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -80,4 +99,5 @@ def delete_department(
     
     db.delete(db_department)
     db.commit()
+    department_cache.invalidate()
     return None 
\ No newline at end of file
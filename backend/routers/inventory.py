@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from collections import defaultdict
+from datetime import date, timedelta
+import models
+import schemas
+from database import get_read_db
+from conditional import conditional_get
+from expiry import MAX_EXPIRY_WINDOW_DAYS
+from auth.auth_handler import get_current_user
+
+router = APIRouter(
+    prefix="/inventory",
+    tags=["Inventory"]
+)
+
+# Conditional GETs answer 304 while the chemical catalogue table is unchanged
+summary_etag = Depends(conditional_get(models.Chemical_catalogue, models.Location))
+
+@router.get("/summary", response_model=schemas.InventorySummary, dependencies=[summary_etag])
+def get_inventory_summary(
+    expiring_within_days: int = Query(30, ge=0, le=MAX_EXPIRY_WINDOW_DAYS),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    rollup = models.InventoryRollup
+    groups = db.query(rollup).filter(rollup.container_count > 0).order_by(
+        rollup.dimension, rollup.group_key, rollup.sub_key, rollup.unit
+    ).all()
+
+    # Location groups are kept per Location.id; report them by building and room
+    location_ids = [int(group.group_key) for group in groups if group.dimension == "location" and group.group_key]
+    locations = {
+        location.id: location
+        for location in db.query(models.Location).filter(models.Location.id.in_(location_ids))
+    }
+    location_totals = defaultdict(lambda: [0, 0.0])
+
+    today = date.today().isoformat()
+    horizon = (date.today() + timedelta(days=expiring_within_days)).isoformat()
+    summary = schemas.InventorySummary(
+        total_containers=0, expired=0, expiring=0, expiring_within_days=expiring_within_days,
+        by_department=[], by_location=[], by_cas=[]
+    )
+    for group in groups:
+        # Empty keys stand for NULL columns in the catalogue
+        unit = group.unit or None
+        if group.dimension == "department":
+            summary.total_containers += group.container_count
+            summary.by_department.append(schemas.DepartmentTotal(
+                department=group.group_key or None, unit=unit,
+                container_count=group.container_count, total_quantity=group.total_quantity
+            ))
+        elif group.dimension == "location":
+            location = locations.get(int(group.group_key)) if group.group_key else None
+            key = (location.location_building, location.location_room, unit) if location else (None, None, unit)
+            location_totals[key][0] += group.container_count
+            location_totals[key][1] += group.total_quantity
+        elif group.dimension == "cas":
+            summary.by_cas.append(schemas.CasTotal(
+                cas=group.group_key or None, unit=unit,
+                container_count=group.container_count, total_quantity=group.total_quantity
+            ))
+        elif group.dimension == "expiry":
+            if group.group_key < today:
+                summary.expired += group.container_count
+            elif group.group_key <= horizon:
+                summary.expiring += group.container_count
+    for (building, room, unit), (count, quantity) in sorted(
+        location_totals.items(), key=lambda item: tuple(part or "" for part in item[0])
+    ):
+        summary.by_location.append(schemas.LocationTotal(
+            location_building=building, location_room=room, unit=unit,
+            container_count=count, total_quantity=quantity
+        ))
+    return summary
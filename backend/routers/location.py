@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import models
 import schemas
-from database import get_db
+from database import get_db, get_read_db
+from pagination import paginate, paginate_cached
+from locations import location_cache
+from conditional import conditional_get
+from serialization import FAST_SERIALIZATION, fast_response, rows_to_dicts
+from catalogue_queries import EXPORT_COLUMNS, chemical_rows
 from auth.auth_handler import get_current_user
 
 router = APIRouter(
@@ -11,6 +17,14 @@ router = APIRouter(
     tags=["Location"]
 )
 
+# Conditional GETs answer 304 while the locations table is unchanged
+location_etag = Depends(conditional_get(models.Location))
+
+# Containers embed their location's path, so their listings depend on both tables
+chemical_etag = Depends(conditional_get(models.Chemical_catalogue, models.Location))
+
+LOCATION_EXISTS = "A location with this building, room and storage already exists"
+
 @router.post("/", response_model=schemas.LocationResponse)
 def create_location(
     location: schemas.LocationCreate,
@@ -23,31 +37,65 @@ def create_location(
         edited_by=current_user.id
     )
     db.add(db_location)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=LOCATION_EXISTS)
     db.refresh(db_location)
+    location_cache.invalidate()
     return db_location
 
-@router.get("/", response_model=List[schemas.LocationResponse])
+@router.get("/", response_model=List[schemas.LocationResponse], dependencies=[location_etag])
 def get_locations(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    locations = db.query(models.Location).offset(skip).limit(limit).all()
+    locations = paginate_cached(
+        location_cache, db.query(models.Location), models.Location, schemas.LocationResponse, response, skip, limit, cursor
+    )
     return locations
 
-@router.get("/{location_id}", response_model=schemas.LocationResponse)
+@router.get("/{location_id}", response_model=schemas.LocationResponse, dependencies=[location_etag])
 def get_location(
     location_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    location = db.query(models.Location).filter(models.Location.id == location_id).first()
+    def load():
+        row = db.query(models.Location).filter(models.Location.id == location_id).first()
+        return None if row is None else schemas.LocationResponse.model_validate(row)
+
+    location = location_cache.get_or_load(("detail", response.headers.get("ETag"), location_id), load)
     if location is None:
         raise HTTPException(status_code=404, detail="Location not found")
     return location
 
+@router.get("/{location_id}/chemicals", response_model=List[schemas.ChemicalCatalogueResponse], dependencies=[chemical_etag])
+def get_location_chemicals(
+    location_id: int,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    if db.get(models.Location, location_id) is None:
+        raise HTTPException(status_code=404, detail="Location not found")
+    # Served from the location_id index
+    base = chemical_rows(db) if FAST_SERIALIZATION else db.query(models.Chemical_catalogue)
+    query = base.filter(models.Chemical_catalogue.location_id == location_id)
+    chemicals = paginate(query, models.Chemical_catalogue, response, skip, limit, cursor)
+    if FAST_SERIALIZATION:
+        return fast_response(response, rows_to_dicts(EXPORT_COLUMNS, chemicals))
+    return chemicals
+
 @router.put("/{location_id}", response_model=schemas.LocationResponse)
 def update_location(
     location_id: int,
@@ -64,8 +112,14 @@ def update_location(
         setattr(db_location, field, value)
     
     db_location.edited_by = current_user.id
-    db.commit()
+    # Containers reference the location by id, so a rename is this one row
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=LOCATION_EXISTS)
     db.refresh(db_location)
+    location_cache.invalidate()
     return db_location
 
 @router.delete("/{location_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -77,7 +131,13 @@ def delete_location(
     db_location = db.query(models.Location).filter(models.Location.id == location_id).first()
     if db_location is None:
         raise HTTPException(status_code=404, detail="Location not found")
+    in_use = db.query(models.Chemical_catalogue.id).filter(
+        models.Chemical_catalogue.location_id == location_id
+    ).first()
+    if in_use is not None:
+        raise HTTPException(status_code=400, detail="Location still holds chemicals")
     
     db.delete(db_location)
     db.commit()
+    location_cache.invalidate()
     return None 
\ No newline at end of file
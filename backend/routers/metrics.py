@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from metrics import route_metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def prometheus_metrics():
+    # Prometheus text exposition format; counters are per process
+    return PlainTextResponse(route_metrics.render(), media_type="text/plain; version=0.0.4")
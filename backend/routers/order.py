@@ -1,57 +1,298 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert, literal, select, union_all, update
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+import time
 import models
 import schemas
-from database import get_db
+from database import get_db, get_read_db
+from pagination import paginate
+from batch import batch_result, item_failed, item_ok
+from notifier import order_notifier
+from serialization import FAST_SERIALIZATION, fast_response, rows_to_dicts, schema_columns, schema_fields
+from conditional import conditional_get
+from versions import order_queue_version
 from auth.auth_handler import get_current_user
+import audit
 
 router = APIRouter(
     prefix="/order",
     tags=["Order"]
 )
 
+# Conditional GETs answer 304 while the orders table is unchanged
+order_etag = Depends(conditional_get(models.Order))
+
+# Upper bound for how long GET /order/queue may hold a long-poll open
+MAX_QUEUE_WAIT_SECONDS = 60
+# How often a waiting long-poll re-reads the queue version for writes made by other workers
+QUEUE_POLL_SECONDS = 1
+
+# Legacy string field, FK column and the error reported when the user is missing
+USER_REFERENCES = (
+    ("requested_by", "requested_by_id", "Contact user not found"),
+    ("requested_to", "requested_to_id", "Handler user not found"),
+)
+
+def _resolve_user_ids(db: Session, payloads):
+    # Unless the FK is given explicitly, the string fields name the user by id
+    # or, as in responses, by name; names resolve like the migration backfill
+    names = set()
+    for payload in payloads:
+        for field, id_field, _ in USER_REFERENCES:
+            value = payload.get(field)
+            if payload.get(id_field) is not None or value is None:
+                continue
+            if str(value).isdigit():
+                payload[id_field] = int(value)
+            else:
+                names.add(value)
+    if names:
+        ids_by_name = {}
+        for user_id, name in db.execute(
+            select(models.User.id, models.User.name).where(models.User.name.in_(names)).order_by(models.User.id)
+        ):
+            ids_by_name.setdefault(name, user_id)
+        for payload in payloads:
+            for field, id_field, _ in USER_REFERENCES:
+                if payload.get(id_field) is None and payload.get(field) in ids_by_name:
+                    payload[id_field] = ids_by_name[payload[field]]
+    return payloads
+
+def _existing_references(db: Session, payloads):
+    # One round trip for every referenced chemical and user, however many orders
+    chemical_ids = {payload["chemical_id"] for payload in payloads if payload.get("chemical_id") is not None}
+    user_ids = {
+        payload[id_field] for payload in payloads for _, id_field, _ in USER_REFERENCES
+        if payload.get(id_field) is not None
+    }
+    lookups = []
+    if chemical_ids:
+        lookups.append(select(literal("chemical"), models.Chemical_catalogue.id, models.Chemical_catalogue.chemical_name).where(
+            models.Chemical_catalogue.id.in_(chemical_ids)
+        ))
+    if user_ids:
+        lookups.append(select(literal("user"), models.User.id, models.User.name).where(models.User.id.in_(user_ids)))
+
+    chemicals, users = set(), {}
+    if lookups:
+        for kind, row_id, name in db.execute(union_all(*lookups)):
+            if kind == "chemical":
+                chemicals.add(row_id)
+            else:
+                users[row_id] = name
+    return chemicals, users
+
+def _reference_error(payload, chemicals, users):
+    if payload.get("chemical_id") is not None and payload["chemical_id"] not in chemicals:
+        return "Chemical not found"
+    for field, id_field, error in USER_REFERENCES:
+        if payload.get(id_field) is None:
+            # A user string that matched nobody; an explicit null id unsets the reference
+            if payload.get(field) is not None:
+                return error
+        elif payload[id_field] not in users:
+            return error
+    return None
+
+def _name_users(payload, users):
+    # Keep the legacy string fields naming the user the FK points at
+    for field, id_field, _ in USER_REFERENCES:
+        if payload.get(id_field) is not None:
+            payload[field] = users[payload[id_field]]
+    return payload
+
+def _validate_references(db: Session, payload):
+    chemicals, users = _existing_references(db, [payload])
+    error = _reference_error(payload, chemicals, users)
+    if error:
+        raise HTTPException(status_code=404, detail=error)
+    _name_users(payload, users)
+
 @router.post("/", response_model=schemas.OrderResponse)
 def create_order(
     order: schemas.OrderCreate,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    # Verify chemical exists
-    chemical = db.query(models.Chemical_catalogue).filter(models.Chemical_catalogue.id == order.chemical_id).first()
-    if not chemical:
-        raise HTTPException(status_code=404, detail="Chemical not found")
-    
-    # Verify contact user exists
-    contact = db.query(models.User).filter(models.User.id == order.contact).first()
-    if not contact:
-        raise HTTPException(status_code=404, detail="Contact user not found")
-    
-    # Verify handler user exists
-    handler = db.query(models.User).filter(models.User.id == order.handler).first()
-    if not handler:
-        raise HTTPException(status_code=404, detail="Handler user not found")
-    
-    db_order = models.Order(**order.model_dump())
+    payload = order.model_dump()
+    _resolve_user_ids(db, [payload])
+    _validate_references(db, payload)
+
+    db_order = models.Order(**payload)
     db.add(db_order)
     db.commit()
     db.refresh(db_order)
+    order_notifier.notify(db_order.requested_to_id)
     return db_order
 
-@router.get("/", response_model=List[schemas.OrderResponse])
+@router.post("/batch", response_model=schemas.BatchResult)
+def create_orders_batch(
+    batch: schemas.OrderBatchCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    payloads = _resolve_user_ids(db, [item.model_dump() for item in batch.items])
+    chemicals, users = _existing_references(db, payloads)
+
+    results, rows, row_indexes = [], [], []
+    for index, payload in enumerate(payloads):
+        error = _reference_error(payload, chemicals, users)
+        if error:
+            results.append(item_failed(index, error))
+            continue
+        rows.append(_name_users(payload, users))
+        row_indexes.append(index)
+        results.append(None)
+
+    if rows:
+        new_ids = db.execute(
+            insert(models.Order).returning(models.Order.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+        for new_id, row in zip(new_ids, rows):
+            audit.record(db, models.Order.__tablename__, new_id, audit.CREATE, after=row)
+        db.commit()
+        order_notifier.notify(*(row.get("requested_to_id") for row in rows))
+        for index, new_id in zip(row_indexes, new_ids):
+            results[index] = item_ok(index, new_id)
+    return batch_result(results)
+
+@router.patch("/batch", response_model=schemas.BatchResult)
+def update_orders_batch(
+    batch: schemas.OrderBatchUpdate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    # Current rows: the handler's queue changes along with the order, and the
+    # audit log records the before values
+    table = models.Order.__table__
+    existing = {row.id: row for row in db.execute(
+        select(table).where(table.c.id.in_([item.id for item in batch.items]))
+    )}
+    patches = _resolve_user_ids(db, [item.patch.model_dump(exclude_unset=True) for item in batch.items])
+    chemicals, users = _existing_references(db, patches)
+
+    results, rows, seen_ids = [], [], set()
+    for index, (item, changes) in enumerate(zip(batch.items, patches)):
+        if item.id not in existing:
+            results.append(item_failed(index, "Order not found", item.id))
+            continue
+        if item.id in seen_ids:
+            results.append(item_failed(index, "Order appears more than once in the batch", item.id))
+            continue
+        error = _reference_error(changes, chemicals, users)
+        if error:
+            results.append(item_failed(index, error, item.id))
+            continue
+        seen_ids.add(item.id)
+        rows.append({"id": item.id, **_name_users(changes, users)})
+        results.append(item_ok(index, item.id))
+        current = audit.column_values(existing[item.id])
+        audit.record(db, table.name, item.id, audit.UPDATE, current, {**current, **changes})
+
+    if rows:
+        # Bulk UPDATE by primary key, executed as batched executemany
+        db.execute(update(models.Order), rows)
+        db.commit()
+        order_notifier.notify(
+            *(existing[row["id"]].requested_to_id for row in rows),
+            *(row["requested_to_id"] for row in rows if "requested_to_id" in row)
+        )
+    return batch_result(results)
+
+@router.post("/batch/delete", response_model=schemas.BatchResult)
+def delete_orders_batch(
+    batch: schemas.BatchDelete,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    table = models.Order.__table__
+    existing = {row.id: row for row in db.execute(select(table).where(table.c.id.in_(batch.ids)))}
+
+    results, deleted = [], set()
+    for index, order_id in enumerate(batch.ids):
+        if order_id not in existing or order_id in deleted:
+            results.append(item_failed(index, "Order not found", order_id))
+            continue
+        deleted.add(order_id)
+        results.append(item_ok(index, order_id))
+        audit.record(db, table.name, order_id, audit.DELETE, before=audit.column_values(existing[order_id]))
+
+    if deleted:
+        db.query(models.Order).filter(models.Order.id.in_(deleted)).delete(synchronize_session=False)
+        db.commit()
+        order_notifier.notify(*(existing[order_id].requested_to_id for order_id in deleted))
+    return batch_result(results)
+
+@router.get("/", response_model=List[schemas.OrderResponse], dependencies=[order_etag])
 def get_orders(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    orders = db.query(models.Order).offset(skip).limit(limit).all()
+    if FAST_SERIALIZATION:
+        query = db.query(*schema_columns(schemas.OrderResponse, models.Order))
+        rows = paginate(query, models.Order, response, skip, limit, cursor)
+        return fast_response(response, rows_to_dicts(schema_fields(schemas.OrderResponse), rows))
+    orders = paginate(db.query(models.Order), models.Order, response, skip, limit, cursor)
     return orders
 
-@router.get("/{order_id}", response_model=schemas.OrderResponse)
+def _load_queue(db: Session, handler_id: int, order_status: str, limit: int):
+    try:
+        return db.query(models.Order).filter(
+            models.Order.requested_to_id == handler_id,
+            models.Order.status == order_status
+        ).order_by(models.Order.id).limit(limit).all()
+    finally:
+        # Hand the connection back to the pool between polls
+        db.close()
+
+def _queue_version(db: Session, handler_id: int) -> int:
+    try:
+        return order_queue_version(db, handler_id)
+    finally:
+        db.close()
+
+@router.get("/queue", response_model=schemas.OrderQueue)
+async def get_order_queue(
+    requested_to: Optional[int] = None,
+    order_status: str = Query("pending", alias="status"),
+    since_version: Optional[int] = None,
+    wait: float = Query(0, ge=0, le=MAX_QUEUE_WAIT_SECONDS),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Orders assigned to a handler (the current user by default).
+
+    Pass the returned version back as since_version together with wait to
+    long-poll: the request returns as soon as the handler's queue changes.
+    """
+    handler_id = requested_to if requested_to is not None else current_user.id
+    # The version comes from the database, so it is the same on every worker.
+    # Writes through this worker end the wait at once, writes through another
+    # one at the next re-read. The session (shared with get_current_user) is
+    # closed between reads so no connection is held while idle.
+    notified = order_notifier.version(handler_id)
+    version = await run_in_threadpool(_queue_version, db, handler_id)
+    deadline = time.monotonic() + wait
+    while wait and since_version == version:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        notified = await order_notifier.wait(handler_id, notified, min(remaining, QUEUE_POLL_SECONDS))
+        version = await run_in_threadpool(_queue_version, db, handler_id)
+    items = await run_in_threadpool(_load_queue, db, handler_id, order_status, limit)
+    return {"requested_to": handler_id, "status": order_status, "version": version, "items": items}
+
+@router.get("/{order_id}", response_model=schemas.OrderResponse, dependencies=[order_etag])
 def get_order(
     order_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
     order = db.query(models.Order).filter(models.Order.id == order_id).first()
@@ -71,30 +312,16 @@ def update_order(
         raise HTTPException(status_code=404, detail="Order not found")
     
     update_data = order_update.model_dump(exclude_unset=True)
+    _resolve_user_ids(db, [update_data])
+    _validate_references(db, update_data)
     
-    # Verify chemical exists if being updated
-    if "chemical_id" in update_data:
-        chemical = db.query(models.Chemical_catalogue).filter(models.Chemical_catalogue.id == update_data["chemical_id"]).first()
-        if not chemical:
-            raise HTTPException(status_code=404, detail="Chemical not found")
-    
-    # Verify contact user exists if being updated
-    if "requested_by" in update_data:
-        contact = db.query(models.User).filter(models.User.id == update_data["requested_by"]).first()
-        if not contact:
-            raise HTTPException(status_code=404, detail="Contact user not found")
-    
-    # Verify handler user exists if being updated
-    if "requested_to" in update_data:
-        handler = db.query(models.User).filter(models.User.id == update_data["requested_to"]).first()
-        if not handler:
-            raise HTTPException(status_code=404, detail="Handler user not found")
-    
+    previous_handler = db_order.requested_to_id
     for field, value in update_data.items():
         setattr(db_order, field, value)
     
     db.commit()
     db.refresh(db_order)
+    order_notifier.notify(previous_handler, db_order.requested_to_id)
     return db_order
 
 @router.delete("/{order_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -107,6 +334,8 @@ def delete_order(
     if db_order is None:
         raise HTTPException(status_code=404, detail="Order not found")
     
+    handler = db_order.requested_to_id
     db.delete(db_order)
     db.commit()
+    order_notifier.notify(handler)
     return None 
\ No newline at end of file
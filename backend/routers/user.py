@@ -1,18 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import models
 import schemas
-from database import get_db
-from auth.auth_handler import get_current_user, get_password_hash, verify_password
+from database import get_db, get_read_db
+from pagination import paginate
+from conditional import conditional_get
+from serialization import FAST_SERIALIZATION, fast_response, rows_to_dicts, schema_columns, schema_fields
+from auth.auth_handler import (
+    get_current_user,
+    get_password_hash,
+    invalidate_cached_user,
+    run_password_task,
+    verify_password
+)
 from schemas import UserCreate, UserUpdate, UserResponse, PasswordResetSelf, PasswordResetByParent
 from models import User
+import audit
 
 router = APIRouter(
     prefix="/users",
     tags=["Users"]
 )
 
+# Conditional GETs answer 304 while the users table is unchanged
+user_etag = Depends(conditional_get(models.User))
+
 @router.get("/me", response_model= UserResponse)
 async def read_users_me(current_user: User = Depends(get_current_user)):
     return current_user
@@ -34,20 +47,25 @@ def create_user(
     db.refresh(db_user)
     return db_user
 
-@router.get("/", response_model=List[ UserResponse])
+@router.get("/", response_model=List[ UserResponse], dependencies=[user_etag])
 def get_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    users = db.query(User).offset(skip).limit(limit).all()
+    if FAST_SERIALIZATION:
+        rows = paginate(db.query(*schema_columns(UserResponse, User)), User, response, skip, limit, cursor)
+        return fast_response(response, rows_to_dicts(schema_fields(UserResponse), rows))
+    users = paginate(db.query(User), User, response, skip, limit, cursor)
     return users
 
-@router.get("/{user_id}", response_model= UserResponse)
+@router.get("/{user_id}", response_model= UserResponse, dependencies=[user_etag])
 def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     user = db.query(User).filter(User.id == user_id).first()
@@ -77,11 +95,13 @@ def update_user(
         if existing_user:
             raise HTTPException(status_code=400, detail="Email already registered")
     
+    previous_email = db_user.email
     for field, value in update_data.items():
         setattr(db_user, field, value)
     
     db.commit()
     db.refresh(db_user)
+    invalidate_cached_user(previous_email, db_user.email)
     return db_user
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -96,6 +116,7 @@ def delete_user(
     
     db.delete(db_user)
     db.commit()
+    invalidate_cached_user(db_user.email)
     return None
 
 @router.post("/reset-password")
@@ -104,10 +125,14 @@ def reset_password_self(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    if not verify_password(data.old_password, current_user.password):
+    if not run_password_task(verify_password, data.old_password, current_user.password, db=db):
         raise HTTPException(status_code=400, detail="Old password is incorrect.")
-    current_user.password = get_password_hash(data.new_password)
+    hashed_password = run_password_task(get_password_hash, data.new_password)
+    # current_user may be a cached copy, so update the row through this session
+    user = db.query(User).filter(User.id == current_user.id).first()
+    user.password = hashed_password
     db.commit()
+    invalidate_cached_user(user.email)
     return {"detail": "Password updated successfully."}
 
 @router.post("/reset-password-by-parent")
@@ -121,6 +146,9 @@ def reset_password_by_parent(
         raise HTTPException(status_code=404, detail="User not found.")
     if user.parent_id != current_user.id:
         raise HTTPException(status_code=403, detail="You are not authorized to reset this user's password.")
-    user.password = get_password_hash(data.new_password)
+    hashed_password = run_password_task(get_password_hash, data.new_password, db=db)
+    db.query(User).filter(User.id == data.user_id).update({"password": hashed_password})
+    audit.record(db, User.__tablename__, user.id, audit.UPDATE, {"password": user.password}, {"password": hashed_password})
     db.commit()
+    invalidate_cached_user(user.email)
     return {"detail": "Password reset successfully for user."}
\ No newline at end of file
@@ -1,7 +1,7 @@
 # schemas.py
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime, date
-from typing import Optional
+from typing import Any, Dict, Optional, List
 
 # Authentication Schemas
 class Token(BaseModel):
@@ -84,9 +84,13 @@ class LocationUpdate(BaseModel):
     location_note: Optional[str] = None
 
 class LocationResponse(LocationBase):
+    # Containers migrated from partial location strings can point at partial paths
+    location_building: Optional[str] = None
+    location_room: Optional[str] = None
+    location_storage: Optional[str] = None
     id: int
-    created_by: int
-    edited_by: int
+    created_by: Optional[int] = None
+    edited_by: Optional[int] = None
     created_at: datetime
     edited_at: datetime
 
@@ -101,9 +105,11 @@ class ChemicalCatalogueBase(BaseModel):
     quantity: float
     unit: str
     supplier: str
-    location_building: str
-    location_room: str
-    location_storage: str
+    # Either reference a location by id or give its path; unknown paths are created
+    location_id: Optional[int] = None
+    location_building: Optional[str] = None
+    location_room: Optional[str] = None
+    location_storage: Optional[str] = None
     purchase_date: date
     expiry_date: date
     comment: Optional[str] = None
@@ -120,9 +126,10 @@ class ChemicalCatalogueUpdate(BaseModel):
     quantity: Optional[float] = None
     unit: Optional[str] = None
     supplier: Optional[str] = None
+    location_id: Optional[int] = None
     location_building: Optional[str] = None
     location_room: Optional[str] = None
-    location_self: Optional[str] = None
+    location_storage: Optional[str] = None
     purchase_date: Optional[date] = None
     expiry_date: Optional[date] = None
     comment: Optional[str] = None
@@ -139,12 +146,124 @@ class ChemicalCatalogueResponse(ChemicalCatalogueBase):
     class Config:
         from_attributes = True
 
+class ChemicalCatalogueFilter(BaseModel):
+    name: Optional[str] = None
+    cas: Optional[str] = None
+    barcode: Optional[str] = None
+    supplier: Optional[str] = None
+    department: Optional[str] = None
+    status: Optional[str] = None
+    location_id: Optional[int] = None
+    location_building: Optional[str] = None
+    location_room: Optional[str] = None
+    location_storage: Optional[str] = None
+    expiry_from: Optional[date] = None
+    expiry_to: Optional[date] = None
+    sort_by: str = "id"
+    sort_order: str = "asc"
+
+class ChemicalCataloguePage(BaseModel):
+    items: List[ChemicalCatalogueResponse]
+    total: int
+    skip: int
+    limit: int
+    next_cursor: Optional[str] = None
+
+class BarcodeLookup(BaseModel):
+    barcodes: List[str] = Field(min_length=1, max_length=1000)
+
+class BarcodeLookupResult(BaseModel):
+    items: List[ChemicalCatalogueResponse]
+    missing: List[str]
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+class ChemicalImportResult(BaseModel):
+    inserted: int = 0
+    failed: int = 0
+    errors: List[ImportRowError] = []
+
+class ChemicalBatchCreate(BaseModel):
+    items: List[ChemicalCatalogueCreate]
+
+class ChemicalBatchUpdateItem(BaseModel):
+    id: int
+    patch: ChemicalCatalogueUpdate
+
+class ChemicalBatchUpdate(BaseModel):
+    items: List[ChemicalBatchUpdateItem]
+
+# Stock Ledger Schemas
+class StockMovementCreate(BaseModel):
+    amount: float = Field(gt=0)
+    comment: Optional[str] = None
+
+class StockMovementResponse(BaseModel):
+    id: int
+    chemical_id: int
+    kind: str
+    change: float
+    quantity_after: float
+    unit: Optional[str] = None
+    comment: Optional[str] = None
+    created_by: Optional[int] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+# Audit Log Schemas
+class AuditEntryResponse(BaseModel):
+    id: int
+    entity: str
+    entity_id: Optional[int] = None
+    action: str
+    changes: Dict[str, List[Any]]
+    user_id: Optional[int] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+# Inventory Summary Schemas
+class DepartmentTotal(BaseModel):
+    department: Optional[str] = None
+    unit: Optional[str] = None
+    container_count: int
+    total_quantity: float
+
+class LocationTotal(BaseModel):
+    location_building: Optional[str] = None
+    location_room: Optional[str] = None
+    unit: Optional[str] = None
+    container_count: int
+    total_quantity: float
+
+class CasTotal(BaseModel):
+    cas: Optional[str] = None
+    unit: Optional[str] = None
+    container_count: int
+    total_quantity: float
+
+class InventorySummary(BaseModel):
+    total_containers: int
+    expired: int
+    expiring: int
+    expiring_within_days: int
+    by_department: List[DepartmentTotal]
+    by_location: List[LocationTotal]
+    by_cas: List[CasTotal]
+
 # Order Schemas
 class OrderBase(BaseModel):
     chemical_id: int
     chemical_name: str
     requested_by: str
     requested_to: str
+    requested_by_id: Optional[int] = None
+    requested_to_id: Optional[int] = None
     comment: Optional[str] = None
     status: str = "pending"
 
@@ -156,6 +275,8 @@ class OrderUpdate(BaseModel):
     chemical_name: Optional[str] = None
     requested_by: Optional[str] = None
     requested_to: Optional[str] = None
+    requested_by_id: Optional[int] = None
+    requested_to_id: Optional[int] = None
     comment: Optional[str] = None
     status: Optional[str] = None
 
@@ -165,4 +286,35 @@ class OrderResponse(OrderBase):
     edited_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class OrderQueue(BaseModel):
+    requested_to: int
+    status: str
+    version: int
+    items: List[OrderResponse]
+
+class OrderBatchCreate(BaseModel):
+    items: List[OrderCreate]
+
+class OrderBatchUpdateItem(BaseModel):
+    id: int
+    patch: OrderUpdate
+
+class OrderBatchUpdate(BaseModel):
+    items: List[OrderBatchUpdateItem]
+
+# Batch Operation Schemas
+class BatchDelete(BaseModel):
+    ids: List[int]
+
+class BatchItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    ok: bool
+    error: Optional[str] = None
+
+class BatchResult(BaseModel):
+    succeeded: int = 0
+    failed: int = 0
+    results: List[BatchItemResult] = []
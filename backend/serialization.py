@@ -0,0 +1,32 @@
+# serialization.py
+import os
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+# Opt-in fast path: encode responses with orjson and serve the large list
+# endpoints from column tuples, skipping per-row Pydantic validation
+FAST_SERIALIZATION = os.getenv("FAST_SERIALIZATION", "0") == "1"
+
+
+def schema_fields(schema) -> list:
+    return list(schema.model_fields)
+
+
+def schema_columns(schema, model, **overrides) -> list:
+    """One labelled column per field of a response schema; overrides map a field to another column."""
+    return [overrides.get(field, getattr(model, field)).label(field) for field in schema_fields(schema)]
+
+
+def rows_to_dicts(fields, rows) -> list:
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def fast_response(response: Response, content) -> ORJSONResponse:
+    # Returning a Response bypasses response_model, so carry over the headers
+    # (ETag, X-Next-Cursor, ...) that dependencies set on the injected one
+    headers = {
+        name: value for name, value in response.headers.items()
+        if name not in ("content-length", "content-type")
+    }
+    return ORJSONResponse(content, headers=headers)
@@ -0,0 +1,84 @@
+# serve.py
+"""Production entry point: migrate once, then serve the app from N worker processes.
+
+    python serve.py --workers 4 --host 0.0.0.0
+
+Every setting also reads an environment variable (see README). Workers are
+spawned, not forked, so each imports the app and opens its own connection
+pool; nothing database-related crosses a process boundary.
+"""
+import argparse
+import logging
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "0"))
+HOST = os.getenv("HOST", "127.0.0.1")
+PORT = int(os.getenv("PORT", "8000"))
+KEEPALIVE_SECONDS = int(os.getenv("KEEPALIVE_SECONDS", "5"))
+BACKLOG = int(os.getenv("BACKLOG", "2048"))
+GRACEFUL_SHUTDOWN_SECONDS = int(os.getenv("GRACEFUL_SHUTDOWN_SECONDS", "30"))
+
+
+def default_workers() -> int:
+    return WEB_CONCURRENCY or os.cpu_count() or 1
+
+
+def migrate() -> bool:
+    """Run migrations in the parent so workers don't all race to ALTER tables on startup.
+
+    Returns whether the database is in-memory SQLite.
+    """
+    from sqlalchemy.engine import make_url
+
+    from database import DATABASE_URL, engine, is_sqlite
+    from migrations import run_migrations
+
+    run_migrations(engine)
+    engine.dispose()
+    return is_sqlite(DATABASE_URL) and make_url(DATABASE_URL).database in (None, "", ":memory:")
+
+
+def main(args):
+    in_memory = migrate()
+    if in_memory and args.workers > 1:
+        raise SystemExit("An in-memory SQLite database can't be shared by several workers; set DATABASE_PATH")
+
+    # Read by the workers when they import the app
+    os.environ["MIGRATE_ON_STARTUP"] = "0"
+    os.environ.setdefault("DEBUG", "0")
+
+    import uvicorn
+
+    logger.info("Starting %d worker(s) on %s:%d", args.workers, args.host, args.port)
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        backlog=args.backlog,
+        timeout_keep_alive=args.keepalive,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        proxy_headers=True,
+        log_level="info",
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=default_workers(), help="worker processes (default: CPU count)")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--keepalive", type=int, default=KEEPALIVE_SECONDS, help="seconds an idle keep-alive connection stays open")
+    parser.add_argument("--backlog", type=int, default=BACKLOG, help="pending connections the listening socket queues")
+    parser.add_argument(
+        "--graceful-timeout", type=int, default=GRACEFUL_SHUTDOWN_SECONDS,
+        help="seconds a worker waits for in-flight requests on shutdown"
+    )
+    logging.basicConfig(level=logging.INFO)
+    main(parser.parse_args())
@@ -0,0 +1,50 @@
+# stock.py
+from fastapi import HTTPException
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+
+import audit
+import models
+from rollups import ROLLUP_FIELDS, adjust_rollup_quantity
+
+WITHDRAW = "withdraw"
+RESTOCK = "restock"
+INSUFFICIENT_STOCK = "Insufficient stock"
+
+
+def apply_movement(db: Session, chemical_id: int, kind: str, amount: float, user_id: int, comment=None):
+    """Change a container's quantity by `amount` and record it in the ledger.
+
+    The quantity is changed by one conditional UPDATE rather than read, modified
+    and written back, so concurrent withdrawals cannot overwrite each other. The
+    UPDATE is the transaction's first statement and is followed only by two
+    Core statements (ledger row, rollup totals), which keeps the write lock
+    short on SQLite.
+    """
+    chemical = models.Chemical_catalogue.__table__
+    change = -amount if kind == WITHDRAW else amount
+    stmt = update(chemical).where(chemical.c.id == chemical_id)
+    if kind == WITHDRAW:
+        stmt = stmt.where(chemical.c.quantity >= amount)
+    stmt = stmt.values(
+        quantity=func.coalesce(chemical.c.quantity, 0.0) + change,
+        edited_by=user_id,
+    ).returning(*(chemical.c[field] for field in ROLLUP_FIELDS))
+    row = db.execute(stmt).first()
+    if row is None:
+        db.rollback()
+        exists = db.scalar(select(chemical.c.id).where(chemical.c.id == chemical_id))
+        if exists is None:
+            raise HTTPException(status_code=404, detail="Chemical not found")
+        raise HTTPException(status_code=409, detail=INSUFFICIENT_STOCK)
+
+    values = dict(row._mapping)
+    values["quantity"] = float(values["quantity"])
+    movement_id = db.execute(insert(models.StockMovement.__table__), {
+        "chemical_id": chemical_id, "kind": kind, "change": change, "quantity_after": values["quantity"],
+        "unit": values["unit"], "comment": comment, "created_by": user_id,
+    }).inserted_primary_key[0]
+    adjust_rollup_quantity(db, values, change)
+    audit.record(db, chemical.name, chemical_id, kind, {"quantity": values["quantity"] - change}, {"quantity": values["quantity"]})
+    db.commit()
+    return db.get(models.StockMovement, movement_id)
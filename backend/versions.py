@@ -0,0 +1,120 @@
+# versions.py
+from sqlalchemy import select, text
+
+import models
+
+# Tables whose reads are served with ETags (see conditional.py)
+VERSIONED_TABLES = (
+    models.Chemical_catalogue.__tablename__,
+    models.Location.__tablename__,
+    models.Order.__tablename__,
+    models.Department.__tablename__,
+    models.User.__tablename__,
+)
+VERSIONS_TABLE = models.TableVersion.__tablename__
+
+
+def _sqlite_ddl(table: str):
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        yield f"""CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} AFTER {event} ON {table} BEGIN
+            UPDATE {VERSIONS_TABLE} SET version = version + 1 WHERE name = '{table}';
+        END"""
+
+
+def _postgresql_ddl(table: str):
+    # One bump per statement rather than per row
+    yield f"DROP TRIGGER IF EXISTS {table}_version ON {table}"
+    yield f"""CREATE TRIGGER {table}_version AFTER INSERT OR UPDATE OR DELETE ON {table}
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()"""
+
+
+POSTGRESQL_FUNCTION = f"""CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE {VERSIONS_TABLE} SET version = version + 1 WHERE name = TG_TABLE_NAME;
+    RETURN NULL;
+END $$ LANGUAGE plpgsql"""
+
+
+def ensure_table_versions(engine):
+    """Create the version rows and the triggers that bump them on every write."""
+    with engine.begin() as conn:
+        for table in VERSIONED_TABLES:
+            conn.execute(text(
+                f"INSERT INTO {VERSIONS_TABLE} (name, version) SELECT :name, 0 "
+                f"WHERE NOT EXISTS (SELECT 1 FROM {VERSIONS_TABLE} WHERE name = :name)"
+            ), {"name": table})
+        if engine.dialect.name == "postgresql":
+            conn.execute(text(POSTGRESQL_FUNCTION))
+            ddl = _postgresql_ddl
+        else:
+            ddl = _sqlite_ddl
+        for table in VERSIONED_TABLES:
+            for statement in ddl(table):
+                conn.execute(text(statement))
+
+
+QUEUE_VERSIONS_TABLE = models.OrderQueueVersion.__tablename__
+ORDERS_TABLE = models.Order.__tablename__
+
+
+def _bump_queue_sql(row: str, condition: str) -> str:
+    return (
+        f"INSERT INTO {QUEUE_VERSIONS_TABLE} (requested_to_id, version) "
+        f"SELECT {row}.requested_to_id, 1 WHERE {condition} "
+        f"ON CONFLICT (requested_to_id) DO UPDATE SET version = {QUEUE_VERSIONS_TABLE}.version + 1"
+    )
+
+
+def _sqlite_queue_ddl():
+    bumps = {
+        "INSERT": [_bump_queue_sql("NEW", "NEW.requested_to_id IS NOT NULL")],
+        "UPDATE": [
+            _bump_queue_sql("NEW", "NEW.requested_to_id IS NOT NULL"),
+            _bump_queue_sql("OLD", "OLD.requested_to_id IS NOT NULL AND OLD.requested_to_id IS NOT NEW.requested_to_id"),
+        ],
+        "DELETE": [_bump_queue_sql("OLD", "OLD.requested_to_id IS NOT NULL")],
+    }
+    for event, statements in bumps.items():
+        body = "".join(f"{statement};\n" for statement in statements)
+        yield f"""CREATE TRIGGER IF NOT EXISTS {ORDERS_TABLE}_queue_version_{event.lower()} AFTER {event} ON {ORDERS_TABLE} BEGIN
+            {body}END"""
+
+
+POSTGRESQL_QUEUE_FUNCTION = f"""CREATE OR REPLACE FUNCTION bump_order_queue_version() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP <> 'DELETE' THEN
+        {_bump_queue_sql("NEW", "NEW.requested_to_id IS NOT NULL")};
+    END IF;
+    IF TG_OP = 'DELETE' THEN
+        {_bump_queue_sql("OLD", "OLD.requested_to_id IS NOT NULL")};
+    ELSIF TG_OP = 'UPDATE' THEN
+        {_bump_queue_sql("OLD", "OLD.requested_to_id IS DISTINCT FROM NEW.requested_to_id AND OLD.requested_to_id IS NOT NULL")};
+    END IF;
+    RETURN NULL;
+END $$ LANGUAGE plpgsql"""
+
+
+def _postgresql_queue_ddl():
+    yield POSTGRESQL_QUEUE_FUNCTION
+    yield f"DROP TRIGGER IF EXISTS {ORDERS_TABLE}_queue_version ON {ORDERS_TABLE}"
+    # Per row: a batch can touch several handlers' queues
+    yield f"""CREATE TRIGGER {ORDERS_TABLE}_queue_version AFTER INSERT OR UPDATE OR DELETE ON {ORDERS_TABLE}
+        FOR EACH ROW EXECUTE FUNCTION bump_order_queue_version()"""
+
+
+def ensure_order_queue_versions(engine):
+    """Create the triggers that bump a handler's queue version on every write to their orders.
+
+    The version lives in the database so every worker process sees the same one.
+    """
+    ddl = _postgresql_queue_ddl if engine.dialect.name == "postgresql" else _sqlite_queue_ddl
+    with engine.begin() as conn:
+        for statement in ddl():
+            conn.execute(text(statement))
+
+
+def order_queue_version(db, handler_id: int) -> int:
+    version = db.scalar(
+        select(models.OrderQueueVersion.version).where(models.OrderQueueVersion.requested_to_id == handler_id)
+    )
+    return version or 0
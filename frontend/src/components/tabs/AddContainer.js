@@ -41,7 +41,7 @@ const AddContainer = ({ onClose, onSuccess }) => {
         expiry_date: form.ExpiryDate || null,
         location_building: form.LocationBuilding || null,
         location_room: form.LocationRoom || null,
-        location_shelf: form.LocationShelf || null,
+        location_storage: form.LocationShelf || null,
         comment: form.comment || null,
       };
 
@@ -33,6 +33,18 @@ export const chemicalCatalogueAPI = {
     return handleResponse(response);
   },
 
+  // Filtered, sorted page of chemicals with a total count
+  query: async (filters = {}, skip = 0, limit = 100) => {
+    const params = new URLSearchParams({ ...filters, skip, limit });
+    const response = await fetch(
+      `${API_BASE_URL}/chemical-catalogue/query?${params}`,
+      {
+        headers: getAuthHeaders(),
+      }
+    );
+    return handleResponse(response);
+  },
+
   // Get single chemical
   getById: async (id) => {
     const response = await fetch(`${API_BASE_URL}/chemical-catalogue/${id}`, {
@@ -61,6 +73,54 @@ export const chemicalCatalogueAPI = {
     return handleResponse(response);
   },
 
+  // Take an amount out of a container; fails with 409 if it holds less
+  withdraw: async (id, amount, comment) => {
+    const response = await fetch(`${API_BASE_URL}/chemical-catalogue/${id}/withdraw`, {
+      method: "POST",
+      headers: getAuthHeaders(),
+      body: JSON.stringify({ amount, comment }),
+    });
+    return handleResponse(response);
+  },
+
+  // Add an amount to a container
+  restock: async (id, amount, comment) => {
+    const response = await fetch(`${API_BASE_URL}/chemical-catalogue/${id}/restock`, {
+      method: "POST",
+      headers: getAuthHeaders(),
+      body: JSON.stringify({ amount, comment }),
+    });
+    return handleResponse(response);
+  },
+
+  // Look up a single scanned barcode
+  getByBarcode: async (code) => {
+    const response = await fetch(
+      `${API_BASE_URL}/chemical-catalogue/by-barcode/${encodeURIComponent(code)}`,
+      { headers: getAuthHeaders() }
+    );
+    return handleResponse(response);
+  },
+
+  // Resolve a whole cart of scanned barcodes in one request
+  lookupBarcodes: async (barcodes) => {
+    const response = await fetch(`${API_BASE_URL}/chemical-catalogue/by-barcode`, {
+      method: "POST",
+      headers: getAuthHeaders(),
+      body: JSON.stringify({ barcodes }),
+    });
+    return handleResponse(response);
+  },
+
+  // Stock movement history of a container, newest first
+  getMovements: async (id, skip = 0, limit = 100) => {
+    const response = await fetch(
+      `${API_BASE_URL}/chemical-catalogue/${id}/movements?skip=${skip}&limit=${limit}`,
+      { headers: getAuthHeaders() }
+    );
+    return handleResponse(response);
+  },
+
   // Delete chemical
   delete: async (id) => {
     const response = await fetch(`${API_BASE_URL}/chemical-catalogue/${id}`, {
@@ -204,6 +264,17 @@ export const orderAPI = {
     return handleResponse(response);
   },
 
+  // Get a handler's order queue; with sinceVersion and wait, long-polls until it changes
+  queue: async (requestedTo, status = 'pending', sinceVersion = null, wait = 0) => {
+    const params = new URLSearchParams({ status, wait });
+    if (requestedTo != null) params.append('requested_to', requestedTo);
+    if (sinceVersion != null) params.append('since_version', sinceVersion);
+    const response = await fetch(`${API_BASE_URL}/order/queue?${params}`, {
+      headers: getAuthHeaders(),
+    });
+    return handleResponse(response);
+  },
+
   // Get single order
   getById: async (id) => {
     const response = await fetch(`${API_BASE_URL}/order/${id}`, {